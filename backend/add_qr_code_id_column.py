@@ -1,48 +1,128 @@
 """
 Quick script to add qr_code_id column to existing books table.
 Run this from the backend directory: python add_qr_code_id_column.py
+
+The migration runs in two steps so the table is never locked for the
+index build:
+1. Add the column as nullable with no default (metadata-only change)
+2. Create the unique index in a separate step (CONCURRENTLY on PostgreSQL)
+
+Both steps are idempotent - re-running the script is safe.
 """
 import sqlite3
-import os
+import sys
 from pathlib import Path
 
-# Get database path
+# Add backend to path
 backend_dir = Path(__file__).parent
-db_path = backend_dir / "booksexchange.db"
-
-if not db_path.exists():
-    print(f"[ERROR] Database file not found: {db_path}")
-    exit(1)
-
-print(f"Connecting to database: {db_path}")
-
-try:
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
-    
-    # Check if column exists
-    cursor.execute("PRAGMA table_info(books)")
-    columns = [row[1] for row in cursor.fetchall()]
-    
-    if 'qr_code_id' in columns:
-        print("[OK] Column 'qr_code_id' already exists.")
+sys.path.insert(0, str(backend_dir))
+
+from app.core.config import settings
+
+# Partial index: rows created before this migration have NULL qr_code_id
+SQLITE_INDEX_SQL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_books_qr_code_id "
+    "ON books(qr_code_id) WHERE qr_code_id IS NOT NULL"
+)
+POSTGRES_INDEX_SQL = (
+    "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_books_qr_code_id "
+    "ON books(qr_code_id) WHERE qr_code_id IS NOT NULL"
+)
+
+
+def migrate_sqlite():
+    """Add qr_code_id column and index on a SQLite database."""
+    db_path = backend_dir / "booksexchange.db"
+
+    if not db_path.exists():
+        print(f"[ERROR] Database file not found: {db_path}")
+        return False
+
+    print(f"Connecting to database: {db_path}")
+
+    # Manage transactions explicitly (no implicit BEGIN from the sqlite3 module)
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+
+        # Step 1: add the column (nullable, no default -> no table rewrite)
+        cursor.execute("BEGIN IMMEDIATE")
+        column_exists = cursor.execute(
+            "SELECT 1 FROM pragma_table_info('books') WHERE name = ? LIMIT 1",
+            ("qr_code_id",),
+        ).fetchone() is not None
+
+        if column_exists:
+            print("[OK] Column 'qr_code_id' already exists.")
+            cursor.execute("COMMIT")
+        else:
+            print("Adding 'qr_code_id' column...")
+            cursor.execute("ALTER TABLE books ADD COLUMN qr_code_id VARCHAR(50)")
+            cursor.execute("COMMIT")
+
+        # Step 2: build the index in its own transaction
+        print("Creating index...")
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(SQLITE_INDEX_SQL)
+        cursor.execute("COMMIT")
+        return True
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
         conn.close()
-        exit(0)
-    
-    print("Adding 'qr_code_id' column...")
-    cursor.execute("ALTER TABLE books ADD COLUMN qr_code_id VARCHAR(50) NULL")
-    
-    print("Creating index...")
-    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_books_qr_code_id ON books(qr_code_id)")
-    
-    conn.commit()
-    conn.close()
-    
-    print("[OK] Migration completed! Column 'qr_code_id' added successfully.")
-    print("You can now restart your backend server.")
-    
-except Exception as e:
-    print(f"[ERROR] Migration failed: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
+
+
+def migrate_postgres():
+    """Add qr_code_id column and index on a PostgreSQL database."""
+    from sqlalchemy import text
+    from app.core.database import create_script_engine
+
+    engine = create_script_engine()
+
+    print("Connecting to PostgreSQL database...")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        with autocommit_engine.connect() as conn:
+            column_exists = conn.execute(text("""
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'books' AND column_name = 'qr_code_id'
+            """)).first() is not None
+
+            if column_exists:
+                print("[OK] Column 'qr_code_id' already exists.")
+            else:
+                print("Adding 'qr_code_id' column...")
+                conn.execute(text("ALTER TABLE books ADD COLUMN IF NOT EXISTS qr_code_id VARCHAR(50)"))
+
+            print("Creating index concurrently...")
+            conn.execute(text(POSTGRES_INDEX_SQL))
+        return True
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        if settings.DATABASE_URL.startswith("sqlite"):
+            success = migrate_sqlite()
+        else:
+            success = migrate_postgres()
+
+        if not success:
+            exit(1)
+
+        print("[OK] Migration completed! Column 'qr_code_id' added successfully.")
+        print("You can now restart your backend server.")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,104 @@
+"""
+Short-lived in-process cache of public book responses.
+Serves repeat book detail and QR scan requests without querying; entries
+are invalidated when a change to the book, its history or its owner's
+username is committed through the ORM.
+"""
+import threading
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.models.book import Book, BookHistory
+from app.models.user import User
+
+BOOK_CACHE_TTL_SECONDS = 30
+BOOK_CACHE_MAXSIZE = 2048
+
+# key (e.g. "book:12", "qr:book_ab12...") -> (expires_at, book_id, response)
+_cache: dict = {}
+_lock = threading.Lock()
+
+
+def get_cached_response(key: str) -> Optional[Any]:
+    """Return the cached response for key, or None on a miss."""
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires_at, _book_id, response = entry
+        if expires_at <= now:
+            del _cache[key]
+            return None
+    return response
+
+
+def cache_response(key: str, book_id: int, response: Any):
+    """Store a response built from book_id (and its history) under key."""
+    expires_at = time.monotonic() + BOOK_CACHE_TTL_SECONDS
+    with _lock:
+        if len(_cache) >= BOOK_CACHE_MAXSIZE and key not in _cache:
+            # Evict the oldest entry (dicts keep insertion order)
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = (expires_at, book_id, response)
+
+
+def invalidate_book(book_id: int):
+    """Drop every cached response built from book_id."""
+    with _lock:
+        for key in [key for key, entry in _cache.items() if entry[1] == book_id]:
+            del _cache[key]
+
+
+def _pending_book_ids(target) -> Optional[set]:
+    """Book ids to invalidate when the target's session commits (None if detached)."""
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault("invalidated_book_ids", set())
+
+
+@event.listens_for(Book, "after_update")
+@event.listens_for(Book, "after_delete")
+def _invalidate_on_book_change(mapper, connection, target):
+    """Flush-time hook: any change to a Book row invalidates its responses on commit."""
+    pending = _pending_book_ids(target)
+    if pending is not None:
+        pending.add(target.id)
+
+
+@event.listens_for(BookHistory, "after_insert")
+@event.listens_for(BookHistory, "after_update")
+@event.listens_for(BookHistory, "after_delete")
+def _invalidate_on_history_change(mapper, connection, target):
+    """Flush-time hook: scan responses embed the history timeline."""
+    pending = _pending_book_ids(target)
+    if pending is not None:
+        pending.add(target.book_id)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_owner_rename(mapper, connection, target):
+    """Flush-time hook: responses carry owner_username, which a rename rewrites with a Core UPDATE."""
+    if not inspect(target).attrs.username.history.deleted:
+        return
+    pending = _pending_book_ids(target)
+    if pending is not None:
+        pending.update(connection.execute(select(Book.id).where(Book.owner_id == target.id)).scalars())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    """Drop responses once the change is committed."""
+    # Not at flush time: a concurrent request could re-cache the old committed row before the commit
+    for book_id in session.info.pop("invalidated_book_ids", ()):
+        invalidate_book(book_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    """Rolled-back changes never reached the database; nothing to invalidate."""
+    session.info.pop("invalidated_book_ids", None)
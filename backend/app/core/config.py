@@ -3,9 +3,11 @@ Application configuration settings.
 Loads environment variables and provides configuration values.
 """
 import os
+import re
+from functools import cached_property
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Optional
+from typing import Optional, Tuple
 
 # Get the backend directory (parent of app directory)
 BACKEND_DIR = Path(__file__).parent.parent.parent
@@ -37,6 +39,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-key-change-in-production-please-use-secrets-token-urlsafe-32"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt work factor (each +1 doubles hashing time); hashes are upgraded on next login
+    BCRYPT_ROUNDS: int = 12
+    # Seconds a successful password check is remembered (0 disables the cache)
+    PASSWORD_VERIFY_CACHE_SECONDS: int = 10
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
@@ -46,10 +52,22 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-3.5-turbo"  # Use gpt-4 for better results
     ENABLE_AI_PRICING: bool = True  # Set to False to disable AI pricing
 
-    @property
-    def cors_origins_list(self) -> List[str]:
-        """Parse CORS_ORIGINS string into a list."""
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+    @cached_property
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        """Parse CORS_ORIGINS string into a tuple (computed once)."""
+        return tuple(origin.strip() for origin in self.CORS_ORIGINS.split(","))
+
+    @cached_property
+    def cors_origin_regex(self) -> Optional[str]:
+        """Build one regex for wildcard origins such as https://*.vercel.app (None if there are none)."""
+        patterns = [
+            re.escape(origin).replace(r"\*", r"[A-Za-z0-9.-]+")
+            for origin in self.cors_origins_list
+            if "*" in origin and origin != "*"
+        ]
+        if not patterns:
+            return None
+        return "^(?:" + "|".join(patterns) + ")$"
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
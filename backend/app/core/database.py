@@ -1,43 +1,102 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 from app.core.config import settings
 
 # Determine if using SQLite or PostgreSQL
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
+
+def normalize_postgres_url(url: str) -> str:
+    """Point plain postgres:// / postgresql:// URLs at the psycopg (v3) driver."""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+
+# Compiled-statement cache entries per engine (SQLAlchemy default is 500)
+QUERY_CACHE_SIZE = 1200
+
 # Create database engine
 # SQLite for fast local development (default)
 # PostgreSQL can be used by changing DATABASE_URL in .env
 if is_sqlite:
     # SQLite configuration - optimized for local development
     # Database file will be created in the backend directory
+    # A small pool of long-lived connections keeps SQLite's page cache warm
     engine = create_engine(
         settings.DATABASE_URL,
         echo=settings.DB_ECHO,
+        query_cache_size=QUERY_CACHE_SIZE,
         connect_args={"check_same_thread": False},  # Required for SQLite with FastAPI
-        pool_pre_ping=True,  # Verify connections before using
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_recycle=1800,  # Recycle connections after 30 minutes
+        pool_pre_ping=False,  # Local file - a checkout can't go stale, skip the per-checkout SELECT 1
     )
 else:
     # PostgreSQL (Neon) configuration - for production deployment
-    # Requires psycopg2-binary in requirements.txt
+    # Requires psycopg[binary] (v3) in requirements.txt
     engine = create_engine(
-        settings.DATABASE_URL,
+        normalize_postgres_url(settings.DATABASE_URL),
         echo=settings.DB_ECHO,
-        pool_pre_ping=True,
+        query_cache_size=QUERY_CACHE_SIZE,
+        # No per-checkout SELECT 1; recycling before Neon's idle timeout avoids stale connections
+        # and /health/db checks connectivity explicitly
+        pool_pre_ping=False,
         pool_size=20,
         max_overflow=40,
-        pool_recycle=3600,  # Recycle connections after 1 hour
+        pool_recycle=300,  # Recycle connections after 5 minutes
         connect_args={
+            "prepare_threshold": 5,  # Server-side prepare after 5 executions of a query
             "connect_timeout": 10,
             "application_name": "bookie_exchange",
         },
     )
 
+# SQLite PRAGMAs applied to every new connection
+# WAL lets readers run alongside a writer; synchronous=NORMAL drops one fsync per commit
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "cache_size=-64000",  # ~64 MB page cache (negative value = KiB)
+    "foreign_keys=ON",
+)
+
+if is_sqlite:
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Apply performance PRAGMAs when SQLite opens a new connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+def create_script_engine():
+    """
+    Engine for one-shot scripts (migrations, maintenance).
+    NullPool opens a connection per checkout and closes it on release,
+    so a script never leaves pooled connections behind.
+    """
+    if is_sqlite:
+        return create_engine(
+            settings.DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=NullPool,
+        )
+    return create_engine(normalize_postgres_url(settings.DATABASE_URL), poolclass=NullPool)
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -48,7 +107,8 @@ Base = declarative_base()
 def get_db():
     """
     Dependency function to get database session.
-    Yields a database session and ensures it's closed after use.
+    Yields a database session backed by a pooled connection and ensures
+    it's closed (returning the connection to the pool) after use.
     """
     db = SessionLocal()
     try:
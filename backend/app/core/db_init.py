@@ -2,24 +2,19 @@
 Database initialization and reset utilities.
 Handles database creation, dropping, and resetting for SQLite and PostgreSQL.
 """
-import os
 from pathlib import Path
+from typing import Optional
 from app.core.database import Base, engine
 from app.core.config import settings
-from app.models import (
-    User, Book, BookHistory, Wishlist,
-    ExchangeRequest, ExchangeDispute,
-    PaymentTransaction,
-    PointTransaction,
-    ForumPost, ForumReply, ForumVote,
-    Message,
-    ExchangePoint,
-)
+from app import models as _models  # noqa: F401 - registers all model mappers with Base
 
+# Resolved once at import time - DATABASE_URL does not change at runtime
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
 
-def get_db_file_path():
-    """Get the SQLite database file path from DATABASE_URL."""
-    if settings.DATABASE_URL.startswith("sqlite"):
+
+def _compute_db_file_path():
+    """Resolve the SQLite database file path from DATABASE_URL."""
+    if IS_SQLITE:
         # Extract file path from sqlite:///./booksexchange.db
         db_url = settings.DATABASE_URL.replace("sqlite:///", "")
         # Handle relative paths
@@ -33,18 +28,32 @@ def get_db_file_path():
     return None
 
 
+DB_FILE_PATH: Optional[str] = _compute_db_file_path()
+
+
+def get_db_file_path():
+    """Get the SQLite database file path from DATABASE_URL."""
+    return DB_FILE_PATH
+
+
+def _remove_db_files(db_file: str):
+    """Remove the SQLite database file along with its WAL/shared-memory sidecars."""
+    # Close pooled connections so no handle keeps the old file alive
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        Path(db_file + suffix).unlink(missing_ok=True)
+
+
 def reset_database():
     """
     Reset the database by dropping all tables and recreating them.
     For SQLite, this also removes the database file for a clean start.
     """
-    is_sqlite = settings.DATABASE_URL.startswith("sqlite")
-    
     print("=" * 60)
     print("Resetting Database")
     print("=" * 60)
     
-    if is_sqlite:
+    if IS_SQLITE:
         # For SQLite, drop all tables first, then remove the file
         print("Dropping all tables...")
         try:
@@ -54,26 +63,23 @@ def reset_database():
             print(f"⚠️  Warning: Error dropping tables: {e}")
         
         # Remove the database file for a completely fresh start
-        db_file = get_db_file_path()
-        if db_file and os.path.exists(db_file):
+        db_file = DB_FILE_PATH
+        if db_file:
             try:
-                os.remove(db_file)
+                _remove_db_files(db_file)
                 print(f"✅ Removed database file: {db_file}")
             except Exception as e:
                 print(f"⚠️  Warning: Could not remove database file: {e}")
-    else:
-        # For PostgreSQL, just drop all tables
-        print("Dropping all tables...")
-        try:
-            Base.metadata.drop_all(bind=engine)
-            print("✅ All tables dropped")
-        except Exception as e:
-            print(f"⚠️  Warning: Error dropping tables: {e}")
     
     # Create all tables with correct schema
+    # PostgreSQL drops and recreates in a single connection/transaction
     print("\nCreating all tables with correct schema...")
     try:
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            if not IS_SQLITE:
+                Base.metadata.drop_all(bind=conn)
+                print("✅ All tables dropped")
+            Base.metadata.create_all(bind=conn)
         print("✅ All tables created successfully!")
         
         # List created tables
@@ -81,8 +87,8 @@ def reset_database():
         for table_name in sorted(Base.metadata.tables.keys()):
             print(f"  - {table_name}")
         
-        if is_sqlite:
-            db_file = get_db_file_path()
+        if IS_SQLITE:
+            db_file = DB_FILE_PATH
             if db_file:
                 print(f"\n📊 SQLite database file: {db_file}")
         else:
@@ -96,6 +102,26 @@ def reset_database():
         return False
 
 
+def create_missing_indexes(conn):
+    """
+    Create model indexes missing from existing tables.
+    create_all() only builds indexes for tables it creates, so indexes
+    added to models later need this for databases created earlier.
+    Existing names are read from the catalog rather than with checkfirst:
+    SQLite reflection skips expression indexes (e.g. lower(email)), so
+    checkfirst would re-create them and fail.
+    """
+    if IS_SQLITE:
+        existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    else:
+        existing = set(conn.exec_driver_sql("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()").scalars())
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                # index.create honours ddl_if (PostgreSQL-only indexes are skipped on SQLite)
+                index.create(bind=conn)
+
+
 def init_db():
     """Create all database tables if they don't exist."""
     print("=" * 60)
@@ -105,7 +131,10 @@ def init_db():
     print("\nCreating tables...")
     
     try:
-        Base.metadata.create_all(bind=engine)
+        # Create tables and missing indexes on one connection
+        with engine.begin() as conn:
+            Base.metadata.create_all(bind=conn)
+            create_missing_indexes(conn)
         print("\n✅ Database tables initialized!")
         
         # List tables
@@ -113,8 +142,8 @@ def init_db():
         for table_name in sorted(Base.metadata.tables.keys()):
             print(f"  - {table_name}")
         
-        if settings.DATABASE_URL.startswith("sqlite"):
-            db_file = get_db_file_path()
+        if IS_SQLITE:
+            db_file = DB_FILE_PATH
             if db_file:
                 print(f"\n📊 SQLite database file: {db_file}")
         else:
@@ -134,19 +163,17 @@ def drop_db():
     print("⚠️  WARNING: This will drop ALL tables!")
     print("=" * 60)
     
-    is_sqlite = settings.DATABASE_URL.startswith("sqlite")
-    
     try:
         Base.metadata.drop_all(bind=engine)
         print("\n✅ All database tables dropped!")
         
-        if is_sqlite:
+        if IS_SQLITE:
             # Optionally remove the file
-            db_file = get_db_file_path()
-            if db_file and os.path.exists(db_file):
+            db_file = DB_FILE_PATH
+            if db_file:
                 response = input(f"\nRemove database file '{db_file}'? (yes/no): ")
                 if response.lower() == "yes":
-                    os.remove(db_file)
+                    _remove_db_files(db_file)
                     print(f"✅ Database file removed: {db_file}")
         
         return True
@@ -1,6 +1,10 @@
 """
 Security utilities for authentication and password hashing.
 """
+import hashlib
+import hmac
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,13 +12,63 @@ import bcrypt
 
 from app.core.config import settings
 
+# Recently verified (password, hash) pairs -> expiry, so repeat logins skip bcrypt
+# Keys are HMACs under SECRET_KEY; plain passwords are never stored
+_VERIFY_CACHE_MAXSIZE = 1024
+_verify_cache: dict = {}
+_verify_cache_lock = threading.Lock()
+
+# Decoded JWT payloads by raw token -> (expiry, payload); only valid tokens are cached
+TOKEN_CACHE_SECONDS = 60
+_TOKEN_CACHE_MAXSIZE = 4096
+_token_cache: dict = {}
+_token_cache_lock = threading.Lock()
+
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    """Keyed digest of a password/hash pair (a changed hash never matches an old entry)."""
+    message = hashed_password.encode('utf-8') + b"\0" + plain_password.encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.blake2b).digest()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password."""
-    return bcrypt.checkpw(
+    """
+    Verify a plain password against a hashed password.
+    Successful checks are cached for PASSWORD_VERIFY_CACHE_SECONDS; failures
+    always pay the full bcrypt cost.
+    """
+    ttl = settings.PASSWORD_VERIFY_CACHE_SECONDS
+    if ttl > 0:
+        key = _verify_cache_key(plain_password, hashed_password)
+        now = time.monotonic()
+        with _verify_cache_lock:
+            expires_at = _verify_cache.get(key)
+            if expires_at is not None:
+                if expires_at > now:
+                    return True
+                del _verify_cache[key]
+    
+    verified = bcrypt.checkpw(
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
     )
+    
+    if verified and ttl > 0:
+        with _verify_cache_lock:
+            if len(_verify_cache) >= _VERIFY_CACHE_MAXSIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                _verify_cache.pop(next(iter(_verify_cache)))
+            _verify_cache[key] = now + ttl
+    return verified
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS."""
+    # bcrypt hashes look like $2b$12$<salt+hash>; the third field is the cost
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
 
 
 def get_password_hash(password: str) -> str:
@@ -30,7 +84,7 @@ def get_password_hash(password: str) -> str:
         password_bytes = password_bytes[:72]
     
     # Generate salt and hash password
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Return as string
@@ -62,6 +116,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and verify a JWT access token.
+    Valid tokens are cached for up to TOKEN_CACHE_SECONDS (never past their own
+    expiry), so repeat requests skip the signature check.
     
     Args:
         token: JWT token string
@@ -69,8 +125,26 @@ def decode_access_token(token: str) -> Optional[dict]:
     Returns:
         Decoded token payload if valid, None otherwise
     """
+    now = time.time()
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > now:
+                return payload
+            del _token_cache[token]
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    
+    expires_at = now + TOKEN_CACHE_SECONDS
+    if isinstance(payload.get("exp"), (int, float)):
+        expires_at = min(expires_at, payload["exp"])
+    with _token_cache_lock:
+        if len(_token_cache) >= _TOKEN_CACHE_MAXSIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            _token_cache.pop(next(iter(_token_cache)))
+        _token_cache[token] = (expires_at, payload)
+    return payload
@@ -0,0 +1,84 @@
+"""
+Short-lived in-process cache of authenticated users.
+Lets get_current_user skip the users SELECT on every request; entries are
+invalidated whenever a User row is updated or deleted through the ORM.
+"""
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.user import User
+
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_MAXSIZE = 10_000
+
+# Columns needed downstream of get_current_user (password_hash is never cached)
+# points_balance is left out: a cached balance could be stale and must never be
+# the base of a write, so it is loaded from the row on first access instead
+CACHED_USER_COLUMNS = (
+    "id",
+    "username",
+    "email",
+    "full_name",
+    "is_active",
+    "is_admin",
+    "created_at",
+)
+
+# username -> (expires_at, column snapshot)
+_cache: dict = {}
+_lock = threading.Lock()
+
+
+def get_cached_user(username: str, db: Session) -> Optional[User]:
+    """
+    Return the cached user attached to db without querying, or None on a miss.
+    The snapshot is merged with load=False so the instance behaves like a
+    normally loaded User (lazy relationships and updates still work).
+    points_balance is not cached; reading it issues a SELECT of that column.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(username)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= now:
+            del _cache[username]
+            return None
+
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    user = db.merge(user, load=False)
+    db.expire(user, ["points_balance"])
+    return user
+
+
+def cache_user(user: User):
+    """Store a snapshot of a freshly loaded user."""
+    snapshot = {column: getattr(user, column) for column in CACHED_USER_COLUMNS}
+    expires_at = time.monotonic() + USER_CACHE_TTL_SECONDS
+    with _lock:
+        if len(_cache) >= USER_CACHE_MAXSIZE and user.username not in _cache:
+            # Evict the oldest entry (dicts keep insertion order)
+            _cache.pop(next(iter(_cache)))
+        _cache[user.username] = (expires_at, snapshot)
+
+
+def invalidate_user(username: str):
+    """Drop a user from the cache (no-op if it was not cached)."""
+    with _lock:
+        _cache.pop(username, None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    """Flush-time hook: any change to a User row invalidates its cached snapshot."""
+    invalidate_user(target.username)
+    # A renamed user is still cached under the old username
+    for old_username in inspect(target).attrs.username.history.deleted:
+        invalidate_user(old_username)
@@ -4,10 +4,21 @@
 FastAPI application entry point.
 Initializes the app, includes routers, and sets up middleware.
 """
+import importlib
+import logging
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app import models as _models  # noqa: F401 - registers all model mappers with Base
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+logger = logging.getLogger(__name__)
 
 
 # Initialize FastAPI app
@@ -15,15 +26,21 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    # orjson encodes response bodies several times faster than the stdlib json module
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS middleware
+# Exact origins are matched with a set lookup; wildcard entries go through one precompiled regex
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
+    allow_origins=frozenset(settings.cors_origins_list),
+    allow_origin_regex=settings.cors_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor (GET /api/auth/users)
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 
@@ -43,93 +60,102 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+def database_health_check():
+    """
+    Database connectivity check (runs SELECT 1).
+    Connections are not pre-pinged on checkout, so monitoring uses this instead.
+    """
+    from fastapi import HTTPException
+    from sqlalchemy import text
+    from app.core.database import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        logger.exception("Database health check failed")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "healthy", "database": "connected"}
+
+
+# Set once the schema has been verified so re-entrant startup is a no-op
+_db_initialized = False
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database tables on startup."""
+    global _db_initialized
+    if _db_initialized:
+        return
+
     try:
+        from sqlalchemy import inspect
         from app.core.database import Base, engine
-        from app.core.config import settings
-
-        from app.core.db_init import init_db
+        from app.core.db_init import init_db, IS_SQLITE, DB_FILE_PATH
         
-        # Import all models to ensure they're registered with Base
-        from app.models import (
-            User, Book, BookHistory, Wishlist,
-            ExchangeRequest, ExchangeDispute,
-            PaymentTransaction,
-            PointTransaction,
-            ForumPost, ForumReply, ForumVote,
-            Message,
-            ExchangePoint,
-        )
+        # Skip create_all when every model table already exists (single reflection query)
+        existing_tables = set(inspect(engine).get_table_names())
+        if existing_tables.issuperset(Base.metadata.tables.keys()):
+            logger.info("Database schema up to date")
+            _db_initialized = True
+            return
         
         # Initialize database (creates tables if they don't exist)
         # This handles schema mismatches by creating missing tables/columns
         success = init_db()
+        _db_initialized = success
         
         if success:
-            if settings.DATABASE_URL.startswith("sqlite"):
-                from app.core.db_init import get_db_file_path
-                db_file = get_db_file_path()
-                if db_file:
-                    print(f"   Database file: {db_file}")
+            if IS_SQLITE:
+                if DB_FILE_PATH:
+                    logger.info("Database file: %s", DB_FILE_PATH)
             else:
-                print(f"   View tables in Neon Console: https://console.neon.tech/")
+                logger.info("View tables in Neon Console: https://console.neon.tech/")
         else:
-            print("\n⚠️  Database initialization had issues.")
-            print("   If you're seeing schema mismatch errors, run:")
-            print("   python reset_db.py")
-            print("   This will reset the database with the correct schema.")
+            logger.warning(
+                "Database initialization had issues. If you're seeing schema mismatch "
+                "errors, run `python reset_db.py` to reset the database with the correct schema."
+            )
             
-    except Exception as e:
-        print(f"\n❌ Error initializing database: {e}")
-        print("\nIf you're seeing schema mismatch errors:")
-        print("  1. Run: python reset_db.py")
-        print("  2. This will recreate the database with correct schema")
-        print("  3. Then restart the server")
-        import traceback
-        traceback.print_exc()
-
-
-
-
-
-# Include all routers
-from app.routes import (
-    auth,
-    books,
-    exchange,
-    payment,
-    forums,
-    messages,
-    points,
-    exchange_points,
-    qr,
-)
-
-# Authentication routes
-app.include_router(auth.router, prefix="/api")
-
-# QR code routes
-app.include_router(qr.router, prefix="/api")
-
-# Book management routes
-app.include_router(books.router, prefix="/api")
+    except Exception:
+        logger.exception(
+            "Error initializing database. If you're seeing schema mismatch errors, "
+            "run `python reset_db.py` to recreate the database, then restart the server."
+        )
 
-# Exchange system routes
-app.include_router(exchange.router, prefix="/api")
 
-# Payment routes
-app.include_router(payment.router, prefix="/api")
+@app.on_event("shutdown")
+def shutdown_event():
+    """Close pooled database connections on shutdown."""
+    from app.core.database import engine
+    engine.dispose()
+
+
+# API routers, mounted under /api in this order
+ROUTERS = (
+    "auth",             # Authentication routes
+    "qr",               # QR code routes
+    "books",            # Book management routes
+    "exchange",         # Exchange system routes
+    "payment",          # Payment routes
+    "forums",           # Forum and discussion routes
+    "messages",         # Messaging routes
+    "points",           # Points management routes
+    "exchange_points",  # Physical exchange points routes
+)
 
-# Forum and discussion routes
-app.include_router(forums.router, prefix="/api")
 
-# Messaging routes
-app.include_router(messages.router, prefix="/api")
+def _include_routers(app: FastAPI):
+    """Import each router module and mount it; a router that fails to import is logged and skipped."""
+    for name in ROUTERS:
+        try:
+            module = importlib.import_module(f"app.routes.{name}")
+        except Exception:
+            logger.exception("Failed to import router app.routes.%s - skipping", name)
+            continue
+        app.include_router(module.router, prefix="/api")
 
-# Points management routes
-app.include_router(points.router, prefix="/api")
 
-# Physical exchange points routes
-app.include_router(exchange_points.router, prefix="/api")
+_include_routers(app)
@@ -10,6 +10,7 @@ from app.models.points import PointTransaction, PointTransactionType
 from app.models.forum import ForumPost, ForumReply, ForumVote
 from app.models.message import Message
 from app.models.exchange_point import ExchangePoint
+from app.models.ai_price import AIPrice
 
 __all__ = [
     "User",
@@ -29,4 +30,5 @@ __all__ = [
     "ForumVote",
     "Message",
     "ExchangePoint",
+    "AIPrice",
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+Persistent cache of AI-suggested book base prices.
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AIPrice(Base):
+    """OpenAI base price for a normalized (title, author, condition)."""
+    __tablename__ = "ai_prices"
+
+    # sha256 hex of the normalized "title|author|condition" (fixed width, any title length)
+    cache_key = Column(String(64), primary_key=True)
+    points = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<AIPrice(cache_key={self.cache_key}, points={self.points})>"
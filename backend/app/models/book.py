@@ -1,9 +1,10 @@
 """
 Book model for book listings and management.
 """
-from datetime import datetime, date
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Date
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Date, Index, DDL, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -11,39 +12,90 @@ from app.core.database import Base
 class Book(Base):
     """Book model for book listings."""
     __tablename__ = "books"
+    __table_args__ = (
+        # Available-book listings ordered by recency; id completes the keyset (created_at, id)
+        Index("ix_books_available_created_id", "is_available", "created_at", "id"),
+        # A user's own books ordered by recency (also serves owner_id lookups)
+        Index("ix_books_owner_created", "owner_id", "created_at"),
+        # Containment queries on image_urls (PostgreSQL JSONB only)
+        Index("ix_books_image_urls_gin", "image_urls", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    permanent_id = Column(String(36), unique=True, index=True, nullable=True)  # UUID - permanent digital identity (nullable for migration)
+    permanent_id = Column(String(36), unique=True, index=True, nullable=False)  # UUID - permanent digital identity
     qr_code_id = Column(String(50), unique=True, index=True, nullable=True)  # Short QR code ID format: book_{uuid_hex[:12]}
     title = Column(String(255), nullable=False, index=True)
     author = Column(String(255), nullable=False, index=True)
     condition = Column(String(20), nullable=False)  # excellent, good, fair, poor
     description = Column(Text, nullable=True)
-    image_urls = Column(JSON, default=[], nullable=False)  # JSON array for compatibility with both SQLite and PostgreSQL
+    image_urls = Column(JSON().with_variant(JSONB(), "postgresql"), default=list, nullable=False)  # JSON array (binary JSONB on PostgreSQL)
     location = Column(String(255), nullable=True)
     point_value = Column(Integer, nullable=False)
     is_available = Column(Boolean, default=True, nullable=False)
     qr_code = Column(String(255), unique=True, index=True, nullable=False)  # QR code string (can encode UUID or URL)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Denormalized from users.username so book lists need no user join
+    owner_username = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
-    owner = relationship("User", back_populates="books", foreign_keys=[owner_id])
-    exchange_requests = relationship("ExchangeRequest", back_populates="book")
-    book_history = relationship("BookHistory", back_populates="book", cascade="all, delete-orphan")
-    wishlist_items = relationship("Wishlist", back_populates="book")
+    # lazy="raise" - queries must eager-load these explicitly (prevents silent N+1 lazy loads)
+    owner = relationship("User", back_populates="books", foreign_keys=[owner_id], lazy="raise")
+    exchange_requests = relationship("ExchangeRequest", back_populates="book", lazy="raise")
+    book_history = relationship("BookHistory", back_populates="book", cascade="all, delete-orphan", lazy="raise")
+    wishlist_items = relationship("Wishlist", back_populates="book", lazy="raise")
 
     def __repr__(self):
         return f"<Book(id={self.id}, title={self.title}, author={self.author})>"
 
 
+# Duplicate-listing check in create_book (same owner, title and author, case-insensitive)
+Index("ix_books_owner_lower_title_author", Book.owner_id, func.lower(Book.title), func.lower(Book.author))
+
+
+# Substring search (lower(col) LIKE '%q%') - trigram GIN indexes, PostgreSQL only
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+Index(
+    "ix_books_title_trgm",
+    func.lower(Book.title).label("title_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"title_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_books_author_trgm",
+    func.lower(Book.author).label("author_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"author_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_books_description_trgm",
+    func.lower(Book.description).label("description_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"description_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_books_location_trgm",
+    func.lower(Book.location).label("location_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"location_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
+
 class BookHistory(Base):
     """Book history tracking for QR code scanning."""
     __tablename__ = "book_history"
+    __table_args__ = (
+        # Chronological history timeline per book (also serves book_id lookups)
+        Index("ix_book_history_book_created", "book_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Nullable to preserve history if user deleted
     reader_name = Column(String(100), nullable=True)  # Store name to survive account deletion
     action = Column(String(50), nullable=False, default="read")  # created, exchanged, scanned, read, etc.
@@ -55,7 +107,7 @@ class BookHistory(Base):
     notes = Column(Text, nullable=True)  # Legacy field for backward compatibility
     city = Column(String(255), nullable=True)  # Legacy field for backward compatibility
     reading_duration_days = Column(Integer, nullable=True)  # How long the book was read (in days) - legacy field
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
 
     # Relationships
     book = relationship("Book", back_populates="book_history")
@@ -68,11 +120,15 @@ class BookHistory(Base):
 class Wishlist(Base):
     """User wishlist for books."""
     __tablename__ = "wishlist"
+    __table_args__ = (
+        # One row per user and book; also serves user_id lookups
+        Index("uq_wishlist_user_book", "user_id", "book_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="wishlist_items")
@@ -1,9 +1,9 @@
 """
 Exchange model for book exchange system.
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 
 from app.core.database import Base
@@ -22,16 +22,24 @@ class ExchangeStatus(str, enum.Enum):
 class ExchangeRequest(Base):
     """Exchange request model."""
     __tablename__ = "exchange_requests"
+    __table_args__ = (
+        # Received/sent request lookups filtered by status
+        Index("ix_exchange_owner_status", "owner_id", "status"),
+        Index("ix_exchange_requester_status", "requester_id", "status"),
+        # Newest-first request history per user (keyset pagination on (created_at, id))
+        Index("ix_exchange_owner_created_id", "owner_id", "created_at", "id"),
+        Index("ix_exchange_requester_created_id", "requester_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
-    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    status = Column(SQLEnum(ExchangeStatus), default=ExchangeStatus.PENDING, nullable=False, index=True)
+    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(SQLEnum(ExchangeStatus, native_enum=False, length=20, validate_strings=True), default=ExchangeStatus.PENDING, nullable=False, index=True)
     points_cost = Column(Integer, nullable=False)
     message = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
 
     # Relationships
@@ -53,8 +61,8 @@ class ExchangeDispute(Base):
     reported_by_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     reason = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
-    status = Column(String(50), default="open", nullable=False)  # open, investigating, resolved, closed
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    status = Column(String(20), default="open", nullable=False)  # open, investigating, resolved, closed
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
     resolved_at = Column(DateTime, nullable=True)
 
     # Relationships
@@ -1,9 +1,9 @@
 """
 Physical exchange point/location models.
 """
-from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -23,8 +23,8 @@ class ExchangePoint(Base):
     operating_hours = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False, index=True)
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Nullable for migration compatibility
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     created_by = relationship("User", foreign_keys=[created_by_user_id])
@@ -1,9 +1,10 @@
 """
 Forum and discussion models.
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -11,21 +12,28 @@ from app.core.database import Base
 class ForumPost(Base):
     """Forum post model."""
     __tablename__ = "forum_posts"
+    __table_args__ = (
+        # Tag containment filters (PostgreSQL JSONB only)
+        Index("ix_forum_posts_tags_gin", "tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
     content = Column(Text, nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Null if anonymous
+    author_username = Column(String(50), nullable=True)  # Denormalized from users.username for list views
     is_anonymous = Column(Boolean, default=False, nullable=False)
-    tags = Column(JSON, default=[], nullable=False)  # JSON array for compatibility with both SQLite and PostgreSQL
+    tags = Column(JSON().with_variant(JSONB(), "postgresql"), default=list, nullable=False)  # JSON array (binary JSONB on PostgreSQL)
     upvotes = Column(Integer, default=0, nullable=False)
     downvotes = Column(Integer, default=0, nullable=False)
+    score = Column(Integer, default=0, server_default="0", nullable=False, index=True)  # upvotes - downvotes, kept in step by the vote handlers
     reply_count = Column(Integer, default=0, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
-    author = relationship("User", back_populates="forum_posts")
+    # Feeds read the denormalized author_username; an unplanned lazy load raises (opt in with selectinload)
+    author = relationship("User", back_populates="forum_posts", lazy="raise_on_sql")
     replies = relationship("ForumReply", back_populates="post", cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -40,15 +48,17 @@ class ForumReply(Base):
     post_id = Column(Integer, ForeignKey("forum_posts.id"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Null if anonymous
+    author_username = Column(String(50), nullable=True)  # Denormalized from users.username for list views
     is_anonymous = Column(Boolean, default=False, nullable=False)
     upvotes = Column(Integer, default=0, nullable=False)
     downvotes = Column(Integer, default=0, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    score = Column(Integer, default=0, server_default="0", nullable=False, index=True)  # upvotes - downvotes, kept in step by the vote handlers
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     post = relationship("ForumPost", back_populates="replies")
-    author = relationship("User", back_populates="forum_replies")
+    author = relationship("User", back_populates="forum_replies", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<ForumReply(id={self.id}, post_id={self.post_id})>"
@@ -57,13 +67,21 @@ class ForumReply(Base):
 class ForumVote(Base):
     """Forum vote model for posts and replies."""
     __tablename__ = "forum_votes"
+    __table_args__ = (
+        # One vote per user per post/reply (NULL post_id/reply_id rows don't collide)
+        # Unique indexes rather than constraints so init_db can add them to existing tables
+        Index("uq_vote_user_post", "user_id", "post_id", unique=True),
+        Index("uq_vote_user_reply", "user_id", "reply_id", unique=True),
+        # Votes per post and "did this user vote?" lookups
+        Index("ix_votes_post_user", "post_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    post_id = Column(Integer, ForeignKey("forum_posts.id"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    post_id = Column(Integer, ForeignKey("forum_posts.id"), nullable=True)
     reply_id = Column(Integer, ForeignKey("forum_replies.id"), nullable=True, index=True)
     vote_type = Column(String(10), nullable=False)  # upvote or downvote
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
 
     # Relationships
     user = relationship("User")
@@ -1,9 +1,9 @@
 """
 In-app messaging models.
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -11,14 +11,21 @@ from app.core.database import Base
 class Message(Base):
     """Message model for in-app messaging."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Inbox: recipient's (unread) messages newest first (also serves recipient_id lookups)
+        Index("ix_messages_recipient_isread_created", "recipient_id", "is_read", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Denormalized from users.username so message lists need no user join
+    sender_username = Column(String(50), nullable=True)
+    recipient_username = Column(String(50), nullable=True)
     subject = Column(String(255), nullable=True)
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
     read_at = Column(DateTime, nullable=True)
 
     # Relationships
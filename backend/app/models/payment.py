@@ -1,9 +1,9 @@
 """
 Payment and point purchase models.
 """
-from datetime import datetime
 from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 
 from app.core.database import Base
@@ -34,10 +34,10 @@ class PaymentTransaction(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     points_amount = Column(Integer, nullable=False)
     amount_usd = Column(Float, nullable=False)
-    payment_method = Column(SQLEnum(PaymentMethod), nullable=False)
-    status = Column(SQLEnum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False, index=True)
+    payment_method = Column(SQLEnum(PaymentMethod, native_enum=False, length=20, validate_strings=True), nullable=False)
+    status = Column(SQLEnum(PaymentStatus, native_enum=False, length=20, validate_strings=True), default=PaymentStatus.PENDING, nullable=False, index=True)
     transaction_id = Column(String(255), unique=True, index=True, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
 
     # Relationships
@@ -1,9 +1,9 @@
 """
 Points transaction model.
 """
-from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 
 from app.core.database import Base
@@ -25,10 +25,10 @@ class PointTransaction(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     amount = Column(Integer, nullable=False)  # Positive for earned/purchased, negative for redeemed
-    transaction_type = Column(SQLEnum(PointTransactionType), nullable=False, index=True)
+    transaction_type = Column(SQLEnum(PointTransactionType, native_enum=False, length=20, validate_strings=True), nullable=False, index=True)
     description = Column(Text, nullable=False)
     related_exchange_id = Column(Integer, ForeignKey("exchange_requests.id"), nullable=True, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="point_transactions")
@@ -1,9 +1,9 @@
 """
 User model for authentication and user management.
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, event, inspect, text
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -11,6 +11,16 @@ from app.core.database import Base
 class User(Base):
     """User model for authentication and profile management."""
     __tablename__ = "users"
+    __table_args__ = (
+        # Active-user search ordered by username (keyset pagination)
+        # Partial index: inactive users are left out, so it stays small
+        Index(
+            "ix_users_active_username_partial",
+            "username",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -20,8 +30,8 @@ class User(Base):
     points_balance = Column(Integer, default=0, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     books = relationship("Book", back_populates="owner", foreign_keys="Book.owner_id")
@@ -35,5 +45,39 @@ class User(Base):
     messages_received = relationship("Message", back_populates="recipient", foreign_keys="Message.recipient_id")
     wishlist_items = relationship("Wishlist", back_populates="user")
 
+    @validates("email")
+    def normalize_email(self, key, email):
+        """Store emails lowercased so lookups can use the lower(email) index."""
+        return email.lower() if email else email
+
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, email={self.email})>"
+
+
+# Case-insensitive email lookups (login/signup query lower(email))
+Index("ix_users_lower_email", func.lower(User.email), unique=True)
+
+
+# Denormalized username copies: (table, user id column, username column)
+DENORMALIZED_USERNAME_COLUMNS = (
+    ("books", "owner_id", "owner_username"),
+    ("forum_posts", "author_id", "author_username"),
+    ("forum_replies", "author_id", "author_username"),
+    ("messages", "sender_id", "sender_username"),
+    ("messages", "recipient_id", "recipient_username"),
+)
+
+
+@event.listens_for(User, "after_update")
+def sync_denormalized_username(mapper, connection, target):
+    """Propagate a username change to the tables that store a copy of it."""
+    if not inspect(target).attrs.username.history.deleted:
+        return
+    for table_name, id_column, username_column in DENORMALIZED_USERNAME_COLUMNS:
+        table = Base.metadata.tables[table_name]
+        # Anonymous forum rows keep author_id NULL, so they are never matched
+        connection.execute(
+            table.update()
+            .where(table.c[id_column] == target.id)
+            .values({username_column: target.username})
+        )
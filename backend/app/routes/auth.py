@@ -2,13 +2,22 @@
 Authentication and user management routes.
 """
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import func, insert, or_, select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, decode_access_token
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    password_needs_rehash,
+    create_access_token,
+    decode_access_token,
+)
+from app.core.user_cache import get_cached_user, cache_user
 from app.models.user import User
 from app.schemas.auth import (
     UserRegister,
@@ -23,8 +32,19 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Columns serialized into UserProfile
+USER_PROFILE_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.full_name,
+    User.points_balance,
+    User.created_at,
+    User.is_active,
+)
+
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
@@ -47,7 +67,12 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.username == username).first()
+    # Serve repeat lookups from the short-TTL user cache (no SELECT on a hit)
+    user = get_cached_user(username, db)
+    if user is None:
+        user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+        if user is not None:
+            cache_user(user)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,7 +90,7 @@ async def get_current_user(
 
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def signup(
+def signup(
     user_data: UserRegister,
     db: Session = Depends(get_db)
 ):
@@ -78,17 +103,23 @@ async def signup(
     - **full_name**: Optional full name
     """
     try:
-        # Check if email already exists (check email first as per requirements)
-        existing_email = db.query(User).filter(User.email == user_data.email).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User already exists"
-            )
-        
-        # Check if username already exists
-        existing_user = db.query(User).filter(User.username == user_data.username).first()
-        if existing_user:
+        # Check email and username in one query (fetches only the two columns)
+        # Emails are case-insensitive (served by the lower(email) index)
+        email = user_data.email.lower()
+        email_matches = func.lower(User.email) == email
+        existing = db.execute(
+            select(User.username, User.email)
+            .where(or_(email_matches, User.username == user_data.username))
+            .order_by(email_matches.desc())  # Email match first if both exist
+            .limit(1)
+        ).first()
+        if existing:
+            # Email takes precedence as per requirements
+            if existing.email.lower() == email:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="User already exists"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
@@ -104,20 +135,22 @@ async def signup(
         # Hash password (get_password_hash handles 72-byte limit automatically)
         hashed_password = get_password_hash(user_data.password)
         
-        # Create new user
-        new_user = User(
-            username=user_data.username,
-            email=user_data.email,
-            password_hash=hashed_password,
-            full_name=user_data.full_name if user_data.full_name else None,
-            points_balance=0,  # Start with 0 points
-            is_active=True,
-            is_admin=False,
-        )
-        
-        db.add(new_user)
+        # Create new user - RETURNING hands back the id and server defaults in the same
+        # round-trip, so there is no refresh SELECT afterwards
+        new_user = db.execute(
+            insert(User)
+            .values(
+                username=user_data.username,
+                email=email,
+                password_hash=hashed_password,
+                full_name=user_data.full_name if user_data.full_name else None,
+                points_balance=0,  # Start with 0 points
+                is_active=True,
+                is_admin=False,
+            )
+            .returning(*USER_PROFILE_COLUMNS)
+        ).one()
         db.commit()
-        db.refresh(new_user)
         
         # Create access token
         access_token = create_access_token(data={"sub": new_user.username})
@@ -126,15 +159,7 @@ async def signup(
         return Token(
             access_token=access_token,
             token_type="bearer",
-            user=UserProfile(
-                id=new_user.id,
-                username=new_user.username,
-                email=new_user.email,
-                full_name=new_user.full_name,
-                points_balance=new_user.points_balance,
-                created_at=new_user.created_at,
-                is_active=new_user.is_active,
-            )
+            user=UserProfile.model_validate(new_user),
         )
     except HTTPException:
         raise
@@ -147,7 +172,7 @@ async def signup(
 
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     login_data: UserLogin,
     db: Session = Depends(get_db)
 ):
@@ -159,8 +184,10 @@ async def login(
     
     Returns a JWT token and user profile for authenticated requests.
     """
-    # Find user by email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    # Find user by email (case-insensitive, served by the lower(email) index)
+    user = db.execute(
+        select(User).where(func.lower(User.email) == login_data.email.lower())
+    ).scalar_one_or_none()
     
     if not user:
         raise HTTPException(
@@ -184,6 +211,11 @@ async def login(
             detail="Inactive user account",
         )
     
+    # Upgrade hashes made with an old work factor now that we have the plain password
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = get_password_hash(login_data.password)
+        db.commit()
+    
     # Create access token
     access_token = create_access_token(data={"sub": user.username})
     
@@ -204,7 +236,7 @@ async def login(
 
 
 @router.get("/me", response_model=UserProfile)
-async def get_current_user_profile(
+def get_current_user_profile(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -225,7 +257,7 @@ async def get_current_user_profile(
 
 
 @router.put("/me", response_model=UserProfile)
-async def update_profile(
+def update_profile(
     profile_update: UserProfileUpdate,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -246,7 +278,7 @@ async def update_profile(
 
 
 @router.post("/change-password", status_code=status.HTTP_200_OK)
-async def change_password(
+def change_password(
     password_data: PasswordChange,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -269,7 +301,7 @@ async def change_password(
 
 
 @router.post("/refresh-token", response_model=Token)
-async def refresh_token(
+def refresh_token(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -286,10 +318,12 @@ async def refresh_token(
 
 
 @router.get("/users", response_model=list[UserProfile])
-async def search_users(
+def search_users(
+    response: Response,
     query: str = Query(None, description="Search term for username, email, or full name"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
+    after: Optional[str] = Query(None, description="Cursor: return users after this username (overrides page)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -299,13 +333,14 @@ async def search_users(
     - **query**: Search term (searches username and email)
     - **page**: Page number (default: 1)
     - **page_size**: Items per page (default: 50, max: 100)
+    - **after**: Keyset cursor - pass the X-Next-Cursor header of the previous page
     
     Returns list of users (excluding current user).
+    When a full page is returned, the X-Next-Cursor response header holds the cursor for the next page.
     Requires authentication.
     """
-    from sqlalchemy import or_
-    
-    users_query = db.query(User).filter(
+    # Select only the UserProfile columns as plain rows (no ORM instances or relationships)
+    users_query = select(*USER_PROFILE_COLUMNS).where(
         User.id != current_user.id,  # Exclude current user
         User.is_active == True  # Only active users
     )
@@ -313,7 +348,7 @@ async def search_users(
     # Search by username or email
     if query:
         search_term = f"%{query}%"
-        users_query = users_query.filter(
+        users_query = users_query.where(
             or_(
                 User.username.ilike(search_term),
                 User.email.ilike(search_term),
@@ -321,21 +356,17 @@ async def search_users(
             )
         )
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    users = users_query.order_by(User.username.asc()).offset(offset).limit(page_size).all()
+    # Apply pagination - keyset when a cursor is given, offset otherwise
+    if after is not None:
+        users_query = users_query.where(User.username > after)
+    else:
+        users_query = users_query.offset((page - 1) * page_size)
+    users_query = users_query.order_by(User.username.asc()).limit(page_size)
     
-    # Convert to response format
-    user_profiles = []
-    for user in users:
-        user_profiles.append(UserProfile(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            full_name=user.full_name,
-            points_balance=user.points_balance,
-            created_at=user.created_at,
-            is_active=user.is_active,
-        ))
+    rows = db.execute(users_query).all()
+    
+    if len(rows) == page_size:
+        response.headers["X-Next-Cursor"] = rows[-1].username
     
-    return user_profiles
+    # Convert to response format (UserProfile reads the row's named columns)
+    return [UserProfile.model_validate(row) for row in rows]
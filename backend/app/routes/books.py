@@ -1,17 +1,29 @@
 """
 Book management routes.
 """
+import base64
+import hashlib
+import re
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db, is_sqlite
+from app.core.book_cache import get_cached_response, cache_response
 from app.routes.auth import get_current_user
 from app.models.book import Book, BookHistory, Wishlist
 from app.models.user import User
+from app.models.points import PointTransaction, PointTransactionType
 from app.schemas.books import (
+    BookCondition,
     BookCreate,
     BookUpdate,
     BookResponse,
@@ -21,9 +33,17 @@ from app.schemas.books import (
     BookHistoryEntry,
     BookHistoryCreate,
 )
+from app.services.book_valuation import get_cached_ai_price, update_book_value
+from app.services.wishlist_alerts import check_and_send_wishlist_alerts
 
 router = APIRouter(prefix="/books", tags=["books"])
 
+# Shape of a permanent_id (uuid4 string) inside a scanned QR code
+UUID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+UUID_RE = re.compile(rf"^{UUID_PATTERN}$", re.IGNORECASE)
+# URL form of a QR code: .../books/{permanent_id}/history
+QR_URL_RE = re.compile(rf"/books/({UUID_PATTERN})(?:/history)?/?$", re.IGNORECASE)
+
 
 def calculate_point_value(condition: str) -> int:
     """Calculate point value based on book condition."""
@@ -61,9 +81,103 @@ def generate_qr_code(permanent_id: str, base_url: str = None) -> str:
     return qr_data
 
 
+# Condition string -> enum member (dict lookup instead of calling the Enum per row)
+CONDITION_ENUM = {condition.value: condition for condition in BookCondition}
+
+
+# Columns serialized into BookResponse (owner_username is stored on books)
+BOOK_RESPONSE_COLUMNS = tuple(Book.__table__.columns)
+
+
+def book_to_response(book: Book, owner_username: str) -> BookResponse:
+    """
+    Build a BookResponse from a Book instance or a BOOK_RESPONSE_COLUMNS row.
+    Uses model_construct: values come straight from the database, so pydantic
+    validation is skipped.
+    """
+    return BookResponse.model_construct(
+        id=book.id,
+        permanent_id=book.permanent_id,
+        qr_code_id=book.qr_code_id,
+        title=book.title,
+        author=book.author,
+        condition=CONDITION_ENUM[book.condition],
+        description=book.description,
+        image_urls=book.image_urls or [],  # NOT NULL with default=list; "or" only guards legacy rows
+        location=book.location,
+        point_value=book.point_value,
+        is_available=book.is_available,
+        qr_code=book.qr_code,
+        owner_id=book.owner_id,
+        owner_username=owner_username,
+        created_at=book.created_at,
+        updated_at=book.updated_at,
+    )
+
+
+def encode_book_cursor(book: Book) -> str:
+    """
+    Encode an opaque keyset pagination cursor from the last book of a page.
+    Carries (created_at, id) so the seek still works if that book is deleted.
+    """
+    return base64.urlsafe_b64encode(f"{book.created_at}|{book.id}".encode("ascii")).decode("ascii")
+
+
+def decode_book_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_book_cursor into (created_at, id)."""
+    try:
+        created_at, book_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(book_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def make_etag(*version) -> str:
+    """
+    Weak ETag from values that identify a response version (rows, timestamps,
+    cursors), so tagging never serializes the response body.
+    """
+    digest = hashlib.blake2b(repr(version).encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conditional_response(request: Request, response: Response, etag: str, build_body: Callable[[], BaseModel]):
+    """
+    Tag a public GET response with etag.
+    Returns an empty 304 when the client already holds that version
+    (If-None-Match) without building the body, otherwise build_body() with
+    ETag/Cache-Control set.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # clients may store it but must revalidate
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return build_body()
+
+
+def refresh_new_book(book_id: int):
+    """
+    Background task run after create_book responds: recompute the book's
+    point value and send wishlist alerts, on a session of its own.
+    """
+    db = SessionLocal()
+    try:
+        check_and_send_wishlist_alerts([book_id], db)
+        update_book_value(book_id, db)  # commits the new point_value
+    finally:
+        db.close()
+
+
 @router.post("", response_model=BookResponse, status_code=status.HTTP_201_CREATED)
-async def create_book(
+def create_book(
     book_data: BookCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -81,11 +195,10 @@ async def create_book(
     Requires authentication. User earns 10 points for listing a book.
     Each book has only one digital identity - prevents duplicate listings.
     """
-    from sqlalchemy import func
-    
     # Check if the same user already has a book with the same title and author
     # This ensures each book has only one digital identity per user
-    existing_book = db.query(Book).filter(
+    # Served by ix_books_owner_lower_title_author; only the id is fetched
+    existing_book = db.query(Book.id).filter(
         Book.owner_id == current_user.id,
         func.lower(Book.title) == func.lower(book_data.title.strip()),
         func.lower(Book.author) == func.lower(book_data.author.strip())
@@ -97,27 +210,19 @@ async def create_book(
             detail=f"You have already listed '{book_data.title}' by {book_data.author}. Each book can only have one digital identity."
         )
     
-    # Calculate point value using AI-based valuation (condition, demand, rarity)
-    from app.services.book_valuation import calculate_book_value, get_openai_pricing
-    
-    # Try OpenAI pricing first for intelligent base value
-    ai_base_points = get_openai_pricing(
-        book_data.title.strip(),
-        book_data.author.strip(),
-        book_data.condition.value
-    )
-    
-    # Get base point value from condition (fallback if AI fails)
-    base_point_value = calculate_point_value(book_data.condition.value)
-    
-    # For new books, demand and rarity will be minimal initially
+    # Initial point value: the client's, else a cached AI base price, else the
+    # condition default. OpenAI is never called here; the background value update
+    # (refresh_new_book) prices the book with AI, demand and rarity after the response
     point_value = book_data.point_value
     if point_value is None:
-        # Use AI pricing if available, otherwise use condition-based default
-        if ai_base_points is not None:
-            point_value = ai_base_points
-        else:
-            point_value = base_point_value
+        point_value = get_cached_ai_price(
+            book_data.title.strip(),
+            book_data.author.strip(),
+            book_data.condition.value,
+            db,
+        )
+    if point_value is None:
+        point_value = calculate_point_value(book_data.condition.value)
     
     # Generate permanent UUID for this book (persists across ownership transfers)
     permanent_id = str(uuid.uuid4())
@@ -129,88 +234,68 @@ async def create_book(
     qr_code = generate_qr_code(permanent_id)
     
     # Create book in database
-    new_book = Book(
-        permanent_id=permanent_id,  # Permanent digital identity (required for new books)
-        qr_code_id=qr_code_id,  # Short QR code ID for easy scanning
-        title=book_data.title.strip(),
-        author=book_data.author.strip(),
-        condition=book_data.condition.value,
-        description=book_data.description.strip() if book_data.description else None,
-        image_urls=book_data.image_urls or [],
-        location=book_data.location.strip() if book_data.location else None,
-        point_value=point_value,
-        qr_code=qr_code,  # QR code string (encodes permanent_id)
-        owner_id=current_user.id,
-        is_available=True,
-    )
-    
-    db.add(new_book)
-    db.flush()  # Flush to get the book ID without committing
+    # INSERT ... RETURNING gives back the full row (ids, timestamps) with no flush or refresh
+    new_book = db.scalars(
+        insert(Book).values(
+            permanent_id=permanent_id,  # Permanent digital identity (required for new books)
+            qr_code_id=qr_code_id,  # Short QR code ID for easy scanning
+            title=book_data.title.strip(),
+            author=book_data.author.strip(),
+            condition=book_data.condition.value,
+            description=book_data.description.strip() if book_data.description else None,
+            image_urls=book_data.image_urls or [],
+            location=book_data.location.strip() if book_data.location else None,
+            point_value=point_value,
+            qr_code=qr_code,  # QR code string (encodes permanent_id)
+            owner_id=current_user.id,
+            owner_username=current_user.username,
+            is_available=True,
+        ).returning(Book)
+    ).one()
     
     # Create book history entry with reader name
-    history_entry = BookHistory(
+    db.execute(insert(BookHistory).values(
         book_id=new_book.id,
         user_id=current_user.id,
         reader_name=current_user.username,  # Store name to survive account deletion
         action="created",
         notes=f"Book '{new_book.title}' by {new_book.author} listed by {current_user.username}",
-    )
-    db.add(history_entry)
+    ))
     
     # Award 10 points to user for listing a book
-    current_user.points_balance += 10
+    # Atomic increment: concurrent listings cannot overwrite each other's award
+    db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(points_balance=User.points_balance + 10)
+        .execution_options(synchronize_session=False)
+    )
     
     # Create point transaction record
-    from app.models.points import PointTransaction, PointTransactionType
-    point_transaction = PointTransaction(
+    db.execute(insert(PointTransaction).values(
         user_id=current_user.id,
         amount=10,
         transaction_type=PointTransactionType.EARNED,
         description=f"Earned 10 points for listing book: {new_book.title}",
-    )
-    db.add(point_transaction)
+    ))
+    
+    # Build the response before commit expires the instance (saves a reload)
+    book_response = book_to_response(new_book, current_user.username)
+    book_id = new_book.id
     
     db.commit()
-    db.refresh(new_book)
     
-    # Check for wishlist alerts (book is now available)
-    from app.services.wishlist_alerts import check_and_send_wishlist_alerts
-    check_and_send_wishlist_alerts(new_book.id, db)
+    # Wishlist alerts and the demand/rarity-based value update run after the
+    # response is sent; the listing returns with its initial point_value
+    background_tasks.add_task(refresh_new_book, book_id)
     
-    # Update book value using AI-based calculation (now that book exists)
-    from app.services.book_valuation import update_book_value
-    updated_value = update_book_value(new_book.id, db)
-    new_book.point_value = updated_value
-    db.commit()
-    db.refresh(new_book)
-    
-    # Return book response with owner username
-    # Convert condition string to enum
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(new_book.condition)
-    
-    return BookResponse(
-        id=new_book.id,
-        permanent_id=getattr(new_book, 'permanent_id', None),  # Handle missing column gracefully
-        qr_code_id=getattr(new_book, 'qr_code_id', None),  # Short QR code ID
-        title=new_book.title,
-        author=new_book.author,
-        condition=condition_enum,
-        description=new_book.description,
-        image_urls=new_book.image_urls if isinstance(new_book.image_urls, list) else [],
-        location=new_book.location,
-        point_value=new_book.point_value,
-        is_available=new_book.is_available,
-        qr_code=new_book.qr_code,
-        owner_id=new_book.owner_id,
-        owner_username=current_user.username,
-        created_at=new_book.created_at,
-        updated_at=new_book.updated_at,
-    )
+    return book_response
 
 
 @router.get("", response_model=BookListResponse)
-async def list_books(
+def list_books(
+    request: Request,
+    response: Response,
     query: str = Query(None, description="Search query"),
     author: str = Query(None, description="Filter by author"),
     condition: str = Query(None, description="Filter by condition"),
@@ -220,94 +305,95 @@ async def list_books(
     is_available: bool = Query(True, description="Filter by availability"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor (next_cursor of the previous page); overrides page"),
+    include_total: bool = Query(False, description="Also compute total/total_pages (runs a COUNT query)"),
     db: Session = Depends(get_db)
 ):
     """
     List books with search and filter options.
     
     Supports pagination, search by title/author, and filtering by condition, points, location, and availability.
+    Books are returned newest first. Pass next_cursor back as cursor to fetch the following page
+    without OFFSET; total and total_pages are only computed when include_total is set on a page-based request.
     """
-    from sqlalchemy import or_, func
-    from sqlalchemy.orm import joinedload
-    
-    # Build query with eager loading to prevent N+1 queries
-    books_query = db.query(Book).options(joinedload(Book.owner))
-    
-    # Apply filters
+    # Collect filters once; the count and the page query share them
+    filters = []
     if query:
         search_term = f"%{query.lower()}%"
-        books_query = books_query.filter(
+        filters.append(
             or_(
                 func.lower(Book.title).like(search_term),
                 func.lower(Book.author).like(search_term),
-                func.lower(Book.description).like(search_term) if Book.description else False
+                func.lower(Book.description).like(search_term),
             )
         )
     
     if author:
-        books_query = books_query.filter(func.lower(Book.author).like(f"%{author.lower()}%"))
+        filters.append(func.lower(Book.author).like(f"%{author.lower()}%"))
     
     if condition:
-        books_query = books_query.filter(Book.condition == condition.lower())
+        filters.append(Book.condition == condition.lower())
     
     if min_points is not None:
-        books_query = books_query.filter(Book.point_value >= min_points)
+        filters.append(Book.point_value >= min_points)
     
     if max_points is not None:
-        books_query = books_query.filter(Book.point_value <= max_points)
+        filters.append(Book.point_value <= max_points)
     
     if location:
-        books_query = books_query.filter(func.lower(Book.location).like(f"%{location.lower()}%"))
+        filters.append(func.lower(Book.location).like(f"%{location.lower()}%"))
     
     if is_available is not None:
-        books_query = books_query.filter(Book.is_available == is_available)
-    
-    # Get total count (before pagination)
-    total = books_query.count()
-    
-    # Apply pagination
-    skip = (page - 1) * page_size
-    books = books_query.offset(skip).limit(page_size).all()
-    
-    # Convert to response format
-    from app.schemas.books import BookCondition
-    book_responses = []
-    for book in books:
-        condition_enum = BookCondition(book.condition)
-        owner_username = book.owner.username if book.owner else "Unknown"
-        
-        book_responses.append(BookResponse(
-            id=book.id,
-            permanent_id=getattr(book, 'permanent_id', None),
-            qr_code_id=getattr(book, 'qr_code_id', None),
-            title=book.title,
-            author=book.author,
-            condition=condition_enum,
-            description=book.description,
-            image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-            location=book.location,
-            point_value=book.point_value,
-            is_available=book.is_available,
-            qr_code=book.qr_code,
-            owner_id=book.owner_id,
-            owner_username=owner_username,
-            created_at=book.created_at,
-            updated_at=book.updated_at,
-        ))
-    
-    total_pages = (total + page_size - 1) // page_size
+        filters.append(Book.is_available == is_available)
+    
+    # Plain column rows from books alone: no ORM instances, identity map, eager loads or user join
+    books_query = select(*BOOK_RESPONSE_COLUMNS).where(*filters)
+    
+    total = None
+    if cursor:
+        # Keyset pagination: seek past the cursor position, no count
+        cursor_created_at, cursor_id = decode_book_cursor(cursor)
+        if is_sqlite:
+            # SQLite keeps timestamps as text; str(datetime) is the form it stores
+            # ("YYYY-MM-DD HH:MM:SS[.ffffff]"), so ties within a second compare exactly
+            cursor_created_at = literal(str(cursor_created_at))
+        else:
+            cursor_created_at = literal(cursor_created_at, Book.created_at.type)
+        books_query = books_query.where(
+            tuple_(Book.created_at, Book.id) < tuple_(cursor_created_at, literal(cursor_id))
+        )
+    else:
+        if include_total:
+            # Plain SELECT COUNT(*) FROM books WHERE ... (no subquery around the ORM query)
+            total = db.scalar(select(func.count()).select_from(Book).where(*filters))
+        books_query = books_query.offset((page - 1) * page_size)
+    
+    # Newest first (served by ix_books_available_created_id); one extra row tells us if there is a next page
+    rows = db.execute(
+        books_query.order_by(Book.created_at.desc(), Book.id.desc()).limit(page_size + 1)
+    ).all()
+    next_cursor = encode_book_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+    
+    def build_page():
+        # Convert to response format
+        total_pages = (total + page_size - 1) // page_size if total is not None else None
+        return BookListResponse(
+            books=[book_to_response(row, row.owner_username or "Unknown") for row in rows],
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=total_pages,
+            next_cursor=next_cursor,
+        )
     
-    return BookListResponse(
-        books=book_responses,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    # The fetched rows (owner_username included) identify the page; a 304 skips building it
+    etag = make_etag(rows, total, page, page_size, next_cursor)
+    return conditional_response(request, response, etag, build_page)
 
 
 @router.get("/my-books", response_model=List[BookResponse])
-async def get_my_books(
+def get_my_books(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -317,43 +403,54 @@ async def get_my_books(
     Returns all books owned by the authenticated user.
     Requires authentication.
     """
-    from sqlalchemy.orm import joinedload
+    # Plain column rows (served by ix_books_owner_created); every book's owner is the current user
+    rows = db.execute(
+        select(*BOOK_RESPONSE_COLUMNS)
+        .where(Book.owner_id == current_user.id)
+        .order_by(Book.created_at.desc(), Book.id.desc())
+    ).all()
     
-    books = db.query(Book).options(joinedload(Book.owner)).filter(
-        Book.owner_id == current_user.id
-    ).order_by(Book.created_at.desc()).all()
+    return [book_to_response(row, current_user.username) for row in rows]
+
+
+# Rows fetched per round trip while streaming
+STREAM_BATCH_SIZE = 50
+
+
+@router.get("/stream")
+def stream_books(
+    is_available: bool = Query(True, description="Filter by availability"),
+):
+    """
+    Stream every matching book as NDJSON (one BookResponse object per line).
     
-    from app.schemas.books import BookCondition
-    book_responses = []
-    for book in books:
-        condition_enum = BookCondition(book.condition)
-        owner_username = book.owner.username if book.owner else "Unknown"
-        
-        book_responses.append(BookResponse(
-            id=book.id,
-            permanent_id=getattr(book, 'permanent_id', None),
-            qr_code_id=getattr(book, 'qr_code_id', None),
-            title=book.title,
-            author=book.author,
-            condition=condition_enum,
-            description=book.description,
-            image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-            location=book.location,
-            point_value=book.point_value,
-            is_available=book.is_available,
-            qr_code=book.qr_code,
-            owner_id=book.owner_id,
-            owner_username=owner_username,
-            created_at=book.created_at,
-            updated_at=book.updated_at,
-        ))
+    Rows are fetched STREAM_BATCH_SIZE at a time and written as they arrive,
+    so memory stays bounded regardless of how many books match.
+    Newest books first.
+    """
+    def generate():
+        # Own session: it must stay open until the last line has been sent
+        db = SessionLocal()
+        try:
+            books = db.scalars(
+                select(Book)
+                .where(Book.is_available == is_available)
+                .order_by(Book.created_at.desc(), Book.id.desc())
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            for book in books:
+                yield book_to_response(book, book.owner_username or "Unknown").model_dump_json() + "\n"
+        finally:
+            db.close()
     
-    return book_responses
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
 @router.get("/{book_id}", response_model=BookResponse)
-async def get_book(
+def get_book(
     book_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
@@ -361,40 +458,30 @@ async def get_book(
     
     - **book_id**: Book ID
     """
-    book = db.query(Book).options(joinedload(Book.owner)).filter(Book.id == book_id).first()
-    
-    if not book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Book not found"
-        )
-    
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(book.condition)
-    owner_username = book.owner.username if book.owner else "Unknown"
+    cache_key = f"book:{book_id}"
+    cached = get_cached_response(cache_key)
+    if cached is None:
+        book = db.query(Book).filter(Book.id == book_id).first()
+        
+        if not book:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Book not found"
+            )
+        
+        # Version: updated_at moves on every ORM update; owner_username is rewritten
+        # by a Core UPDATE on rename; point_value/is_available are also changed by
+        # follow-up writes that can land within the same (SQLite: 1s) updated_at tick
+        etag = make_etag(book.id, book.updated_at, book.owner_username, book.point_value, book.is_available)
+        cached = (etag, book_to_response(book, book.owner_username or "Unknown"))
+        cache_response(cache_key, book.id, cached)
     
-    return BookResponse(
-        id=book.id,
-        permanent_id=getattr(book, 'permanent_id', None),
-        qr_code_id=getattr(book, 'qr_code_id', None),
-        title=book.title,
-        author=book.author,
-        condition=condition_enum,
-        description=book.description,
-        image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-        location=book.location,
-        point_value=book.point_value,
-        is_available=book.is_available,
-        qr_code=book.qr_code,
-        owner_id=book.owner_id,
-        owner_username=owner_username,
-        created_at=book.created_at,
-        updated_at=book.updated_at,
-    )
+    etag, book_response = cached
+    return conditional_response(request, response, etag, lambda: book_response)
 
 
 @router.put("/{book_id}", response_model=BookResponse)
-async def update_book(
+def update_book(
     book_id: int,
     book_update: BookUpdate,
     current_user: User = Depends(get_current_user),
@@ -418,7 +505,7 @@ async def update_book(
 
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_book(
+def delete_book(
     book_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -431,8 +518,12 @@ async def delete_book(
     
     Requires authentication.
     """
-    # Find the book
-    book = db.query(Book).filter(Book.id == book_id).first()
+    # Find the book (load related collections so the delete cascade can process them)
+    book = db.query(Book).options(
+        selectinload(Book.book_history),
+        selectinload(Book.exchange_requests),
+        selectinload(Book.wishlist_items),
+    ).filter(Book.id == book_id).first()
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -454,7 +545,7 @@ async def delete_book(
 
 
 @router.get("/qr/{qr_code}", response_model=QRCodeScanResponse)
-async def scan_qr_code(
+def scan_qr_code(
     qr_code: str,
     db: Session = Depends(get_db)
 ):
@@ -471,29 +562,29 @@ async def scan_qr_code(
     Returns book information and complete reading history timeline.
     History persists even if user accounts are deleted.
     """
-    book = None
-    
-    # Try to extract UUID from URL format: /books/{uuid}/history
-    if "/books/" in qr_code and "/history" in qr_code:
-        try:
-            # Extract UUID from URL
-            uuid_part = qr_code.split("/books/")[1].split("/history")[0]
-            # Check if permanent_id column exists before querying
-            if hasattr(Book, 'permanent_id'):
-                book = db.query(Book).options(joinedload(Book.owner)).filter(Book.permanent_id == uuid_part).first()
-        except (IndexError, ValueError, AttributeError):
-            pass
-    
-    # If not found, try as direct UUID (permanent_id)
-    if not book and hasattr(Book, 'permanent_id'):
-        try:
-            book = db.query(Book).options(joinedload(Book.owner)).filter(Book.permanent_id == qr_code).first()
-        except Exception:
-            pass
+    cache_key = f"scan:{qr_code}"
+    cached = get_cached_response(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Work out which permanent_id the code can refer to, then look the book up
+    # with one indexed query; the legacy qr_code match covers older books
+    url_match = QR_URL_RE.search(qr_code)
+    if url_match:
+        permanent_id = url_match.group(1)
+    elif UUID_RE.match(qr_code):
+        permanent_id = qr_code
+    else:
+        permanent_id = None
     
-    # If still not found, try legacy qr_code format (for backward compatibility)
-    if not book:
-        book = db.query(Book).options(joinedload(Book.owner)).filter(Book.qr_code == qr_code).first()
+    conditions = [Book.qr_code == qr_code]
+    if permanent_id:
+        conditions.append(Book.permanent_id == permanent_id)
+    candidates = db.query(Book).options(joinedload(Book.owner).raiseload("*")).filter(or_(*conditions)).limit(2).all()
+    # A permanent_id match wins over a legacy qr_code match on another book
+    book = next((candidate for candidate in candidates if candidate.permanent_id == permanent_id), None)
+    if book is None and candidates:
+        book = candidates[0]
     
     if not book:
         raise HTTPException(
@@ -504,11 +595,14 @@ async def scan_qr_code(
     # Get book history with eager loading to avoid N+1 queries
     # History is append-only and persists across ownership transfers
     try:
-        history_entries = db.query(BookHistory).options(
-            joinedload(BookHistory.user)
+        # Only the reader's username is needed: outer join it in as a column (NULL if the user was deleted)
+        history_entries = db.query(BookHistory, User.username).outerjoin(
+            User, User.id == BookHistory.user_id
+        ).options(
+            raiseload("*"),
         ).filter(
             BookHistory.book_id == book.id
-        ).order_by(BookHistory.created_at.asc()).all()  # Chronological order (oldest first) for timeline
+        ).order_by(BookHistory.created_at.asc(), BookHistory.id.asc()).all()  # Chronological order (oldest first) for timeline
     except Exception as e:
         # Graceful error handling - if history query fails, return empty history
         history_entries = []
@@ -516,17 +610,17 @@ async def scan_qr_code(
     # Format history (append-only, ordered chronologically)
     # History persists even if user accounts are deleted
     history = []
-    for entry in history_entries:
+    for entry, user_username in history_entries:
         # Handle deleted users gracefully - use reader_name if available, otherwise show "Anonymous"
         username = None
         reader_name = entry.reader_name
         
         if entry.user_id:
-            if entry.user:
-                username = entry.user.username
+            if user_username is not None:
+                username = user_username
                 # Use username as reader_name if reader_name is not set
                 if not reader_name:
-                    reader_name = entry.user.username
+                    reader_name = user_username
             else:
                 username = "Anonymous"  # User account was deleted but history preserved
                 if not reader_name:
@@ -557,41 +651,25 @@ async def scan_qr_code(
         current_holder = {
             "id": book.owner.id,
             "username": book.owner.username,
-            "email": book.owner.email if hasattr(book.owner, 'email') else None,
+            "email": book.owner.email,
         }
     
     # Convert book to response format
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(book.condition)
     owner_username = book.owner.username if book.owner else "Unknown"
     
-    book_response = BookResponse(
-        id=book.id,
-        permanent_id=getattr(book, 'permanent_id', None),
-        title=book.title,
-        author=book.author,
-        condition=condition_enum,
-        description=book.description,
-        image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-        location=book.location,
-        point_value=book.point_value,
-        is_available=book.is_available,
-        qr_code=book.qr_code,
-        owner_id=book.owner_id,
-        owner_username=owner_username,
-        created_at=book.created_at,
-        updated_at=book.updated_at,
-    )
+    book_response = book_to_response(book, owner_username)
     
-    return QRCodeScanResponse(
+    scan_response = QRCodeScanResponse(
         book=book_response,
         history=history,  # Complete reading timeline
         current_holder=current_holder,
     )
+    cache_response(cache_key, book.id, scan_response)
+    return scan_response
 
 
 @router.post("/{book_id}/history", response_model=BookHistoryEntry, status_code=status.HTTP_201_CREATED)
-async def add_book_history(
+def add_book_history(
     book_id: int,
     history_data: BookHistoryCreate,
     current_user: User = Depends(get_current_user),
@@ -669,7 +747,7 @@ async def add_book_history(
 
 
 @router.get("/by-uuid/{permanent_id}", response_model=BookResponse)
-async def get_book_by_uuid(
+def get_book_by_uuid(
     permanent_id: str,
     db: Session = Depends(get_db)
 ):
@@ -678,13 +756,7 @@ async def get_book_by_uuid(
     
     - **permanent_id**: Permanent book UUID (persists across ownership transfers)
     """
-    if not hasattr(Book, 'permanent_id'):
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="Permanent ID feature not available"
-        )
-    
-    book = db.query(Book).options(joinedload(Book.owner)).filter(Book.permanent_id == permanent_id).first()
+    book = db.query(Book).filter(Book.permanent_id == permanent_id).first()
     
     if not book:
         raise HTTPException(
@@ -692,32 +764,11 @@ async def get_book_by_uuid(
             detail="Book not found with this permanent ID"
         )
     
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(book.condition)
-    owner_username = book.owner.username if book.owner else "Unknown"
-    
-    return BookResponse(
-        id=book.id,
-        permanent_id=book.permanent_id,
-        qr_code_id=getattr(book, 'qr_code_id', None),
-        title=book.title,
-        author=book.author,
-        condition=condition_enum,
-        description=book.description,
-        image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-        location=book.location,
-        point_value=book.point_value,
-        is_available=book.is_available,
-        qr_code=book.qr_code,
-        owner_id=book.owner_id,
-        owner_username=owner_username,
-        created_at=book.created_at,
-        updated_at=book.updated_at,
-    )
+    return book_to_response(book, book.owner_username or "Unknown")
 
 
 @router.post("/by-uuid/{permanent_id}/history", response_model=BookHistoryEntry, status_code=status.HTTP_201_CREATED)
-async def add_book_history_by_uuid(
+def add_book_history_by_uuid(
     permanent_id: str,
     history_data: BookHistoryCreate,
     current_user: User = Depends(get_current_user),
@@ -728,12 +779,6 @@ async def add_book_history_by_uuid(
     
     Same as /{book_id}/history but uses permanent_id instead of book_id.
     """
-    if not hasattr(Book, 'permanent_id'):
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="Permanent ID feature not available"
-        )
-    
     book = db.query(Book).filter(Book.permanent_id == permanent_id).first()
     
     if not book:
@@ -743,11 +788,11 @@ async def add_book_history_by_uuid(
         )
     
     # Use the regular add_book_history logic
-    return await add_book_history(book.id, history_data, current_user, db)
+    return add_book_history(book.id, history_data, current_user, db)
 
 
 @router.post("/{book_id}/wishlist", status_code=status.HTTP_201_CREATED)
-async def add_to_wishlist(
+def add_to_wishlist(
     book_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -760,39 +805,33 @@ async def add_to_wishlist(
     Requires authentication.
     """
     # Check if book exists
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if not book:
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
     
-    # Check if already in wishlist
-    existing = db.query(Wishlist).filter(
-        Wishlist.user_id == current_user.id,
-        Wishlist.book_id == book_id
+    # Add to wishlist; the unique (user_id, book_id) index turns a duplicate into a no-op
+    insert_wishlist = sqlite_insert if is_sqlite else postgresql_insert
+    added = db.execute(
+        insert_wishlist(Wishlist)
+        .values(user_id=current_user.id, book_id=book_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "book_id"])
+        .returning(Wishlist.id)
     ).first()
+    db.commit()
     
-    if existing:
+    if added is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Book is already in your wishlist"
         )
     
-    # Add to wishlist
-    wishlist_item = Wishlist(
-        user_id=current_user.id,
-        book_id=book_id
-    )
-    db.add(wishlist_item)
-    db.commit()
-    db.refresh(wishlist_item)
-    
     return {"message": "Book added to wishlist", "book_id": book_id}
 
 
 @router.delete("/{book_id}/wishlist", status_code=status.HTTP_200_OK)
-async def remove_from_wishlist(
+def remove_from_wishlist(
     book_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -804,27 +843,26 @@ async def remove_from_wishlist(
     
     Requires authentication.
     """
-    # Find wishlist item
-    wishlist_item = db.query(Wishlist).filter(
-        Wishlist.user_id == current_user.id,
-        Wishlist.book_id == book_id
+    # Remove from wishlist in one statement; no row back means it was not there
+    removed = db.execute(
+        delete(Wishlist)
+        .where(Wishlist.user_id == current_user.id, Wishlist.book_id == book_id)
+        .returning(Wishlist.id)
+        .execution_options(synchronize_session=False)
     ).first()
+    db.commit()
     
-    if not wishlist_item:
+    if removed is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book is not in your wishlist"
         )
     
-    # Remove from wishlist
-    db.delete(wishlist_item)
-    db.commit()
-    
     return {"message": "Book removed from wishlist", "book_id": book_id}
 
 
 @router.get("/wishlist/my-list", response_model=List[BookResponse])
-async def get_my_wishlist(
+def get_my_wishlist(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -834,49 +872,19 @@ async def get_my_wishlist(
     Returns all books in the authenticated user's wishlist.
     Requires authentication.
     """
-    from sqlalchemy.orm import joinedload
-    
-    # Get wishlist items with book and owner data
-    wishlist_items = db.query(Wishlist).options(
-        joinedload(Wishlist.book).joinedload(Book.owner)
-    ).filter(
-        Wishlist.user_id == current_user.id
-    ).order_by(Wishlist.created_at.desc()).all()
-    
-    from app.schemas.books import BookCondition
-    book_responses = []
-    for item in wishlist_items:
-        book = item.book
-        if not book:
-            continue
-            
-        condition_enum = BookCondition(book.condition)
-        owner_username = book.owner.username if book.owner else "Unknown"
-        
-        book_responses.append(BookResponse(
-            id=book.id,
-            permanent_id=getattr(book, 'permanent_id', None),
-            qr_code_id=getattr(book, 'qr_code_id', None),
-            title=book.title,
-            author=book.author,
-            condition=condition_enum,
-            description=book.description,
-            image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-            location=book.location,
-            point_value=book.point_value,
-            is_available=book.is_available,
-            qr_code=book.qr_code,
-            owner_id=book.owner_id,
-            owner_username=owner_username,
-            created_at=book.created_at,
-            updated_at=book.updated_at,
-        ))
+    # One query of plain column rows: wishlist -> book (no ORM instances, no user join)
+    rows = db.execute(
+        select(*BOOK_RESPONSE_COLUMNS)
+        .join(Wishlist, Wishlist.book_id == Book.id)
+        .where(Wishlist.user_id == current_user.id)
+        .order_by(Wishlist.created_at.desc(), Wishlist.id.desc())
+    ).all()
     
-    return book_responses
+    return [book_to_response(row, row.owner_username or "Unknown") for row in rows]
 
 
 @router.post("/{book_id}/recalculate-value", response_model=BookResponse)
-async def recalculate_book_value(
+def recalculate_book_value(
     book_id: int,
     use_ai: bool = Query(True, description="Use OpenAI for intelligent pricing"),
     current_user: User = Depends(get_current_user),
@@ -897,7 +905,7 @@ async def recalculate_book_value(
     Requires authentication.
     """
     # Find the book
-    book = db.query(Book).options(joinedload(Book.owner)).filter(Book.id == book_id).first()
+    book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -912,32 +920,11 @@ async def recalculate_book_value(
         )
     
     # Recalculate value using AI and dynamic factors
-    from app.services.book_valuation import update_book_value
-    
     new_value = update_book_value(book_id, db, use_ai=use_ai)
     
     # Refresh book to get updated value
     db.refresh(book)
     
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(book.condition)
-    owner_username = book.owner.username if book.owner else "Unknown"
+    owner_username = current_user.username  # Ownership verified above
     
-    return BookResponse(
-        id=book.id,
-        permanent_id=getattr(book, 'permanent_id', None),
-        qr_code_id=getattr(book, 'qr_code_id', None),
-        title=book.title,
-        author=book.author,
-        condition=condition_enum,
-        description=book.description,
-        image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-        location=book.location,
-        point_value=book.point_value,
-        is_available=book.is_available,
-        qr_code=book.qr_code,
-        owner_id=book.owner_id,
-        owner_username=owner_username,
-        created_at=book.created_at,
-        updated_at=book.updated_at,
-    )
+    return book_to_response(book, owner_username)
@@ -3,15 +3,19 @@ Book exchange management routes.
 Implements exchange system with circular exchange prevention, ownership transfer, and dispute handling.
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import literal, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, raiseload
 
 from app.core.database import get_db
 from app.routes.auth import get_current_user
 from app.models.user import User
 from app.models.book import Book, BookHistory
 from app.models.exchange import ExchangeRequest, ExchangeDispute, ExchangeStatus
+from app.models.points import PointTransaction, PointTransactionType
 from app.services.circular_exchange import check_circular_exchange
+from app.services.wishlist_alerts import check_and_send_wishlist_alerts
 from app.schemas.exchange import (
     ExchangeRequestCreate,
     ExchangeRequestResponse,
@@ -22,9 +26,19 @@ from app.schemas.exchange import (
 
 router = APIRouter(prefix="/exchange", tags=["exchange"])
 
+# Loader options for building ExchangeRequestResponse: only the book title and
+# usernames are fetched (books carry large description/image_urls columns), and
+# anything else raises instead of silently lazy loading (N+1)
+EXCHANGE_RESPONSE_LOAD = (
+    joinedload(ExchangeRequest.book).load_only(Book.id, Book.title, raiseload=True).raiseload("*"),
+    joinedload(ExchangeRequest.requester).load_only(User.id, User.username, raiseload=True).raiseload("*"),
+    joinedload(ExchangeRequest.owner).load_only(User.id, User.username, raiseload=True).raiseload("*"),
+    raiseload("*"),
+)
+
 
 @router.post("/request", response_model=ExchangeRequestResponse, status_code=status.HTTP_201_CREATED)
-async def create_exchange_request(
+def create_exchange_request(
     request_data: ExchangeRequestCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -39,12 +53,14 @@ async def create_exchange_request(
     Prevents circular exchanges using graph theory.
     """
     # Get the book
-    book = db.query(Book).filter(Book.id == request_data.book_id).first()
+    book = db.query(Book).options(joinedload(Book.owner)).filter(Book.id == request_data.book_id).first()
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
+    # Read before commit - committing expires the book and its owner relationship
+    owner_username = book.owner.username
     
     # Check if book is available
     if not book.is_available:
@@ -97,10 +113,7 @@ async def create_exchange_request(
     
     db.add(exchange_request)
     
-    db.commit()
-    db.refresh(exchange_request)
-    
-    # Create book history entry
+    # Create book history entry (written in the same transaction as the request)
     history_entry = BookHistory(
         book_id=book.id,
         user_id=current_user.id,
@@ -109,16 +122,19 @@ async def create_exchange_request(
         notes=f"Exchange request created by {current_user.username}",
     )
     db.add(history_entry)
+    
+    book_title = book.title
     db.commit()
+    db.refresh(exchange_request)
     
     return ExchangeRequestResponse(
         id=exchange_request.id,
         book_id=exchange_request.book_id,
-        book_title=book.title,
+        book_title=book_title,
         requester_id=exchange_request.requester_id,
         requester_username=current_user.username,
         owner_id=exchange_request.owner_id,
-        owner_username=book.owner.username,
+        owner_username=owner_username,
         status=exchange_request.status,
         points_cost=exchange_request.points_cost,
         message=exchange_request.message,
@@ -129,7 +145,7 @@ async def create_exchange_request(
 
 
 @router.post("/approve/{exchange_id}", response_model=ExchangeRequestResponse)
-async def approve_exchange(
+def approve_exchange(
     exchange_id: int,
     approval: ExchangeApproval,
     current_user: User = Depends(get_current_user),
@@ -145,7 +161,11 @@ async def approve_exchange(
     Only the book owner can approve/reject requests.
     Requires authentication.
     """
-    exchange = db.query(ExchangeRequest).filter(ExchangeRequest.id == exchange_id).first()
+    # One query: the exchange with its book, the book's current owner and the requester
+    exchange = db.query(ExchangeRequest).options(
+        joinedload(ExchangeRequest.book).joinedload(Book.owner),
+        joinedload(ExchangeRequest.requester),
+    ).filter(ExchangeRequest.id == exchange_id).first()
     if not exchange:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -159,9 +179,10 @@ async def approve_exchange(
             detail="Only the book owner can approve/reject exchange requests"
         )
     
+    book = exchange.book
+    requester = exchange.requester
+    
     if approval.approve:
-        # Get the book
-        book = db.query(Book).filter(Book.id == exchange.book_id).first()
         if not book:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -169,24 +190,30 @@ async def approve_exchange(
             )
         
         # Transfer ownership immediately upon approval (not duplicate)
-        old_owner_id = book.owner_id
+        old_owner = book.owner
         book.owner_id = exchange.requester_id
+        book.owner_username = requester.username if requester else None
         book.is_available = True  # Mark as available so new owner can list it again
+        current_owner = requester
         
         # Deduct points from requester (only when approved)
-        requester = db.query(User).filter(User.id == exchange.requester_id).first()
         if requester:
-            # Check if requester still has enough points
-            if requester.points_balance < exchange.points_cost:
+            # Guarded atomic deduction: the balance check and the decrement are one
+            # statement, so concurrent approvals cannot overdraw the requester
+            new_balance = db.execute(
+                update(User)
+                .where(User.id == requester.id, User.points_balance >= exchange.points_cost)
+                .values(points_balance=User.points_balance - exchange.points_cost)
+                .returning(User.points_balance)
+                .execution_options(synchronize_session=False)
+            ).scalar_one_or_none()
+            if new_balance is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Requester no longer has enough points. Required: {exchange.points_cost}, Available: {requester.points_balance}"
                 )
             
-            requester.points_balance -= exchange.points_cost
-            
             # Create point transaction for deduction
-            from app.models.points import PointTransaction, PointTransactionType
             redeem_transaction = PointTransaction(
                 user_id=requester.id,
                 amount=-exchange.points_cost,  # Negative for redeemed
@@ -197,12 +224,15 @@ async def approve_exchange(
             db.add(redeem_transaction)
         
         # Award points to the old owner (they received the book's value)
-        old_owner = db.query(User).filter(User.id == old_owner_id).first()
         if old_owner:
-            old_owner.points_balance += exchange.points_cost
+            db.execute(
+                update(User)
+                .where(User.id == old_owner.id)
+                .values(points_balance=User.points_balance + exchange.points_cost)
+                .execution_options(synchronize_session=False)
+            )
             
             # Create point transaction for earning
-            from app.models.points import PointTransaction, PointTransactionType
             earn_transaction = PointTransaction(
                 user_id=old_owner.id,
                 amount=exchange.points_cost,
@@ -217,7 +247,6 @@ async def approve_exchange(
         exchange.completed_at = datetime.utcnow()
         
         # Create book history entries (history persists across ownership transfers)
-        requester = db.query(User).filter(User.id == exchange.requester_id).first()
         history_entry1 = BookHistory(
             book_id=book.id,  # Book ID persists, only owner_id changes
             user_id=exchange.requester_id,
@@ -230,35 +259,33 @@ async def approve_exchange(
         db.add(history_entry1)
     else:
         exchange.status = ExchangeStatus.REJECTED
+        current_owner = book.owner if book else None
         # Make book available again since request was rejected
-        book = db.query(Book).filter(Book.id == exchange.book_id).first()
         if book:
             book.is_available = True
             
             # Check for wishlist alerts
-            from app.services.wishlist_alerts import check_and_send_wishlist_alerts
-            check_and_send_wishlist_alerts(book.id, db)
+            check_and_send_wishlist_alerts([book.id], db)
         
         # No points to refund since points weren't deducted on request
     
+    # Read what the response needs now; commit expires the loaded objects
+    book_title = book.title if book else ""
+    owner_id = book.owner_id if book else exchange.owner_id
+    requester_username = requester.username if requester else ""
+    owner_username = current_owner.username if current_owner else requester_username
+    
     db.commit()
     db.refresh(exchange)
     
-    # Refresh book to get updated owner_id
-    book = db.query(Book).filter(Book.id == exchange.book_id).first()
-    requester = db.query(User).filter(User.id == exchange.requester_id).first()
-    
-    # Get the current owner (which is the requester if approved, or original owner if rejected)
-    current_owner = db.query(User).filter(User.id == book.owner_id).first() if book else None
-    
     return ExchangeRequestResponse(
         id=exchange.id,
         book_id=exchange.book_id,
-        book_title=book.title if book else "",
+        book_title=book_title,
         requester_id=exchange.requester_id,
-        requester_username=requester.username if requester else "",
-        owner_id=book.owner_id if book else exchange.owner_id,
-        owner_username=current_owner.username if current_owner else (requester.username if requester else ""),
+        requester_username=requester_username,
+        owner_id=owner_id,
+        owner_username=owner_username,
         status=exchange.status,
         points_cost=exchange.points_cost,
         message=exchange.message,
@@ -269,7 +296,7 @@ async def approve_exchange(
 
 
 @router.post("/complete/{exchange_id}", response_model=ExchangeRequestResponse)
-async def complete_exchange(
+def complete_exchange(
     exchange_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -328,7 +355,7 @@ async def complete_exchange(
 
 
 @router.post("/cancel/{exchange_id}", response_model=ExchangeRequestResponse)
-async def cancel_exchange(
+def cancel_exchange(
     exchange_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -371,8 +398,7 @@ async def cancel_exchange(
         book.is_available = True
         
         # Check for wishlist alerts
-        from app.services.wishlist_alerts import check_and_send_wishlist_alerts
-        check_and_send_wishlist_alerts(book.id, db)
+        check_and_send_wishlist_alerts([book.id], db)
     
     # Update exchange status
     exchange.status = ExchangeStatus.CANCELLED
@@ -402,7 +428,7 @@ async def cancel_exchange(
 
 
 @router.post("/dispute", response_model=ExchangeDisputeResponse, status_code=status.HTTP_201_CREATED)
-async def create_dispute(
+def create_dispute(
     dispute_data: ExchangeDisputeCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -479,19 +505,24 @@ async def create_dispute(
 
 
 @router.get("/my-requests", response_model=list[ExchangeRequestResponse])
-async def get_my_requests(
+def get_my_requests(
+    response: Response,
     status_filter: str = Query(None, description="Filter by status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = Query(None, description="Keyset cursor (X-Next-Cursor of the previous page); overrides page"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get current user's exchange requests (both sent and received).
     
+    Requests are returned newest first. When another page exists, the
+    X-Next-Cursor response header holds the cursor for it.
     Requires authentication.
     """
-    query = db.query(ExchangeRequest).filter(
+    # Book and both users are many-to-one, so joining them in adds no duplicate rows
+    query = db.query(ExchangeRequest).options(*EXCHANGE_RESPONSE_LOAD).filter(
         (ExchangeRequest.requester_id == current_user.id) |
         (ExchangeRequest.owner_id == current_user.id)
     )
@@ -506,14 +537,29 @@ async def get_my_requests(
                 detail=f"Invalid status: {status_filter}"
             )
     
-    offset = (page - 1) * page_size
-    exchanges = query.order_by(ExchangeRequest.created_at.desc()).offset(offset).limit(page_size).all()
+    # Newest first; order_by must come before offset/limit on a Query
+    query = query.order_by(ExchangeRequest.created_at.desc(), ExchangeRequest.id.desc())
+    if cursor is not None:
+        # Keyset pagination: seek past the cursor row instead of skipping OFFSET rows
+        # The cursor row's created_at is read in SQL (SQLite keeps timestamps as text)
+        cursor_created_at = select(ExchangeRequest.created_at).where(ExchangeRequest.id == cursor).scalar_subquery()
+        query = query.filter(
+            tuple_(ExchangeRequest.created_at, ExchangeRequest.id) < tuple_(cursor_created_at, literal(cursor))
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    # One extra row tells us if there is a next page
+    exchanges = query.limit(page_size + 1).all()
+    if len(exchanges) > page_size:
+        exchanges = exchanges[:page_size]
+        response.headers["X-Next-Cursor"] = str(exchanges[-1].id)
     
     results = []
     for exchange in exchanges:
-        book = db.query(Book).filter(Book.id == exchange.book_id).first()
-        requester = db.query(User).filter(User.id == exchange.requester_id).first()
-        owner = db.query(User).filter(User.id == exchange.owner_id).first()
+        book = exchange.book
+        requester = exchange.requester
+        owner = exchange.owner
         
         results.append(ExchangeRequestResponse(
             id=exchange.id,
@@ -535,7 +581,7 @@ async def get_my_requests(
 
 
 @router.get("/{exchange_id}", response_model=ExchangeRequestResponse)
-async def get_exchange(
+def get_exchange(
     exchange_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -546,7 +592,8 @@ async def get_exchange(
     Only parties involved in the exchange can view it.
     Requires authentication.
     """
-    exchange = db.query(ExchangeRequest).filter(ExchangeRequest.id == exchange_id).first()
+    # One query for the exchange, its book and both users
+    exchange = db.query(ExchangeRequest).options(*EXCHANGE_RESPONSE_LOAD).filter(ExchangeRequest.id == exchange_id).first()
     if not exchange:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -560,9 +607,9 @@ async def get_exchange(
             detail="You are not part of this exchange"
         )
     
-    book = db.query(Book).filter(Book.id == exchange.book_id).first()
-    requester = db.query(User).filter(User.id == exchange.requester_id).first()
-    owner = db.query(User).filter(User.id == exchange.owner_id).first()
+    book = exchange.book
+    requester = exchange.requester
+    owner = exchange.owner
     
     return ExchangeRequestResponse(
         id=exchange.id,
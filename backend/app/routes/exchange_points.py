@@ -37,7 +37,7 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
 
 
 @router.post("", response_model=ExchangePointResponse, status_code=status.HTTP_201_CREATED)
-async def create_exchange_point(
+def create_exchange_point(
     point_data: ExchangePointCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -156,7 +156,7 @@ async def create_exchange_point(
 
 
 @router.get("", response_model=ExchangePointListResponse)
-async def list_exchange_points(
+def list_exchange_points(
     query: str = Query(None, description="Search query"),
     latitude: float = Query(None, description="Latitude for proximity search"),
     longitude: float = Query(None, description="Longitude for proximity search"),
@@ -244,7 +244,7 @@ async def list_exchange_points(
 
 
 @router.get("/nearby", response_model=ExchangePointListResponse)
-async def get_nearby_exchange_points(
+def get_nearby_exchange_points(
     latitude: float = Query(..., description="Latitude"),
     longitude: float = Query(..., description="Longitude"),
     radius_km: float = Query(10.0, description="Search radius in kilometers"),
@@ -298,7 +298,7 @@ async def get_nearby_exchange_points(
 
 
 @router.get("/{point_id}", response_model=ExchangePointResponse)
-async def get_exchange_point(
+def get_exchange_point(
     point_id: int,
     db: Session = Depends(get_db)
 ):
@@ -330,7 +330,7 @@ async def get_exchange_point(
 
 
 @router.put("/{point_id}", response_model=ExchangePointResponse)
-async def update_exchange_point(
+def update_exchange_point(
     point_id: int,
     point_update: ExchangePointUpdate,
     current_user: User = Depends(get_current_user),
@@ -389,7 +389,7 @@ async def update_exchange_point(
 
 
 @router.delete("/{point_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_exchange_point(
+def delete_exchange_point(
     point_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -413,7 +413,7 @@ async def delete_exchange_point(
 
 
 @router.get("/map/bounds", response_model=ExchangePointListResponse)
-async def get_exchange_points_in_bounds(
+def get_exchange_points_in_bounds(
     north: float = Query(..., description="North latitude"),
     south: float = Query(..., description="South latitude"),
     east: float = Query(..., description="East longitude"),
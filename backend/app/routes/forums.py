@@ -4,9 +4,9 @@ Includes abuse detection and anonymous posting.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, desc, asc
+from sqlalchemy import delete, or_, func, desc, asc, select
 
-from app.core.database import get_db
+from app.core.database import get_db, is_sqlite
 from app.routes.auth import get_current_user
 from app.models.user import User
 from app.models.forum import ForumPost, ForumReply, ForumVote
@@ -50,8 +50,30 @@ def detect_abuse(content: str) -> bool:
     return False
 
 
+def vote_counter_updates(model, previous_vote_type, vote_type):
+    """
+    Build the counter UPDATE for a vote on a post or reply.
+    previous_vote_type is the user's existing vote (None if new); voting the
+    same type again removes the vote, voting the other type flips it.
+    score (upvotes - downvotes) is kept in step so listings can sort on its index.
+    """
+    delta = {"upvote": 0, "downvote": 0}
+    if previous_vote_type == vote_type:
+        delta[vote_type] -= 1
+    else:
+        delta[vote_type] += 1
+        if previous_vote_type:
+            delta[previous_vote_type] -= 1
+    
+    return {
+        model.upvotes: model.upvotes + delta["upvote"],
+        model.downvotes: model.downvotes + delta["downvote"],
+        model.score: model.score + delta["upvote"] - delta["downvote"],
+    }
+
+
 @router.post("/posts", response_model=ForumPostResponse, status_code=status.HTTP_201_CREATED)
-async def create_post(
+def create_post(
     post_data: ForumPostCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -78,6 +100,7 @@ async def create_post(
         title=post_data.title,
         content=post_data.content,
         author_id=None if post_data.is_anonymous else current_user.id,
+        author_username=None if post_data.is_anonymous else current_user.username,
         is_anonymous=post_data.is_anonymous,
         tags=post_data.tags or [],
         upvotes=0,
@@ -89,14 +112,12 @@ async def create_post(
     db.commit()
     db.refresh(post)
     
-    author_username = None if post_data.is_anonymous else current_user.username
-    
     return ForumPostResponse(
         id=post.id,
         title=post.title,
         content=post.content,
         author_id=post.author_id,
-        author_username=author_username,
+        author_username=post.author_username,
         is_anonymous=post.is_anonymous,
         tags=post.tags if isinstance(post.tags, list) else [],
         upvotes=post.upvotes,
@@ -108,11 +129,11 @@ async def create_post(
 
 
 @router.get("/posts", response_model=ForumPostListResponse)
-async def list_posts(
+def list_posts(
     query: str = Query(None, description="Search query"),
     tags: str = Query(None, description="Comma-separated tags"),
     author_id: int = Query(None, description="Filter by author ID"),
-    sort_by: str = Query("created_at", description="Sort by: created_at, upvotes, replies"),
+    sort_by: str = Query("created_at", description="Sort by: created_at, upvotes, score, replies"),
     order: str = Query("desc", description="Order: asc, desc"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -138,9 +159,13 @@ async def list_posts(
         tag_list = [tag.strip() for tag in tags.split(",")]
         # Filter posts that have any of the specified tags
         for tag in tag_list:
-            posts_query = posts_query.filter(
-                func.json_extract(ForumPost.tags, '$').contains(tag)
-            )
+            if is_sqlite:
+                posts_query = posts_query.filter(
+                    func.json_extract(ForumPost.tags, '$').contains(tag)
+                )
+            else:
+                # JSONB containment (tags @> '["tag"]') is served by the GIN index
+                posts_query = posts_query.filter(ForumPost.tags.contains([tag]))
     
     # Filter by author
     if author_id:
@@ -149,6 +174,8 @@ async def list_posts(
     # Sorting
     if sort_by == "upvotes":
         order_func = desc(ForumPost.upvotes) if order == "desc" else asc(ForumPost.upvotes)
+    elif sort_by == "score":
+        order_func = desc(ForumPost.score) if order == "desc" else asc(ForumPost.score)
     elif sort_by == "replies":
         order_func = desc(ForumPost.reply_count) if order == "desc" else asc(ForumPost.reply_count)
     else:  # created_at
@@ -159,10 +186,6 @@ async def list_posts(
     # Get total count
     total = posts_query.count()
     
-    # Eager load authors to avoid N+1 queries
-    from sqlalchemy.orm import joinedload
-    posts_query = posts_query.options(joinedload(ForumPost.author))
-    
     # Apply pagination
     offset = (page - 1) * page_size
     posts = posts_query.offset(offset).limit(page_size).all()
@@ -173,16 +196,13 @@ async def list_posts(
     # Convert to response format
     post_responses = []
     for post in posts:
-        author_username = None
-        if not post.is_anonymous and post.author_id and post.author:
-            author_username = post.author.username
-        
+        # author_username is stored on the post, so no user join is needed
         post_responses.append(ForumPostResponse(
             id=post.id,
             title=post.title,
             content=post.content,
             author_id=post.author_id,
-            author_username=author_username,
+            author_username=post.author_username,
             is_anonymous=post.is_anonymous,
             tags=post.tags if isinstance(post.tags, list) else [],
             upvotes=post.upvotes,
@@ -202,7 +222,7 @@ async def list_posts(
 
 
 @router.get("/posts/{post_id}", response_model=ForumPostResponse)
-async def get_post(
+def get_post(
     post_id: int,
     db: Session = Depends(get_db)
 ):
@@ -216,17 +236,12 @@ async def get_post(
             detail="Post not found"
         )
     
-    author_username = None
-    if not post.is_anonymous and post.author_id:
-        author = db.query(User).filter(User.id == post.author_id).first()
-        author_username = author.username if author else None
-    
     return ForumPostResponse(
         id=post.id,
         title=post.title,
         content=post.content,
         author_id=post.author_id,
-        author_username=author_username,
+        author_username=post.author_username,
         is_anonymous=post.is_anonymous,
         tags=post.tags if isinstance(post.tags, list) else [],
         upvotes=post.upvotes,
@@ -238,7 +253,7 @@ async def get_post(
 
 
 @router.put("/posts/{post_id}", response_model=ForumPostResponse)
-async def update_post(
+def update_post(
     post_id: int,
     post_update: ForumPostUpdate,
     current_user: User = Depends(get_current_user),
@@ -282,17 +297,12 @@ async def update_post(
     db.commit()
     db.refresh(post)
     
-    author_username = None
-    if not post.is_anonymous and post.author_id:
-        author = db.query(User).filter(User.id == post.author_id).first()
-        author_username = author.username if author else None
-    
     return ForumPostResponse(
         id=post.id,
         title=post.title,
         content=post.content,
         author_id=post.author_id,
-        author_username=author_username,
+        author_username=post.author_username,
         is_anonymous=post.is_anonymous,
         tags=post.tags if isinstance(post.tags, list) else [],
         upvotes=post.upvotes,
@@ -304,7 +314,7 @@ async def update_post(
 
 
 @router.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_post(
+def delete_post(
     post_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -329,6 +339,11 @@ async def delete_post(
             detail="You can only delete your own posts"
         )
     
+    # Votes have no cascade; remove the post's and its replies' votes first (foreign keys are enforced)
+    db.execute(delete(ForumVote).where(or_(
+        ForumVote.post_id == post.id,
+        ForumVote.reply_id.in_(select(ForumReply.id).where(ForumReply.post_id == post.id)),
+    )))
     db.delete(post)
     db.commit()
     
@@ -336,7 +351,7 @@ async def delete_post(
 
 
 @router.post("/posts/{post_id}/replies", response_model=ForumReplyResponse, status_code=status.HTTP_201_CREATED)
-async def create_reply(
+def create_reply(
     post_id: int,
     reply_data: ForumReplyCreate,
     current_user: User = Depends(get_current_user),
@@ -367,6 +382,7 @@ async def create_reply(
         post_id=post_id,
         content=reply_data.content,
         author_id=None if reply_data.is_anonymous else current_user.id,
+        author_username=None if reply_data.is_anonymous else current_user.username,
         is_anonymous=reply_data.is_anonymous,
         upvotes=0,
         downvotes=0,
@@ -380,16 +396,12 @@ async def create_reply(
     db.commit()
     db.refresh(reply)
     
-    author_username = None
-    if not reply_data.is_anonymous:
-        author_username = current_user.username
-    
     return ForumReplyResponse(
         id=reply.id,
         post_id=reply.post_id,
         content=reply.content,
         author_id=reply.author_id,
-        author_username=author_username,
+        author_username=reply.author_username,
         is_anonymous=reply.is_anonymous,
         upvotes=reply.upvotes,
         downvotes=reply.downvotes,
@@ -399,7 +411,7 @@ async def create_reply(
 
 
 @router.get("/posts/{post_id}/replies", response_model=list[ForumReplyResponse])
-async def get_replies(
+def get_replies(
     post_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
@@ -419,21 +431,16 @@ async def get_replies(
     replies_query = db.query(ForumReply).filter(ForumReply.post_id == post_id)
     
     offset = (page - 1) * page_size
-    replies = replies_query.order_by(ForumReply.created_at.asc()).offset(offset).limit(page_size).all()
+    replies = replies_query.order_by(ForumReply.created_at.asc(), ForumReply.id.asc()).offset(offset).limit(page_size).all()
     
     reply_responses = []
     for reply in replies:
-        author_username = None
-        if not reply.is_anonymous and reply.author_id:
-            author = db.query(User).filter(User.id == reply.author_id).first()
-            author_username = author.username if author else None
-        
         reply_responses.append(ForumReplyResponse(
             id=reply.id,
             post_id=reply.post_id,
             content=reply.content,
             author_id=reply.author_id,
-            author_username=author_username,
+            author_username=reply.author_username,
             is_anonymous=reply.is_anonymous,
             upvotes=reply.upvotes,
             downvotes=reply.downvotes,
@@ -445,7 +452,7 @@ async def get_replies(
 
 
 @router.post("/posts/{post_id}/vote", status_code=status.HTTP_200_OK)
-async def vote_post(
+def vote_post(
     post_id: int,
     vote_type: str = Query(..., description="Vote type: upvote or downvote"),
     current_user: User = Depends(get_current_user),
@@ -476,23 +483,14 @@ async def vote_post(
         ForumVote.reply_id == None
     ).first()
     
+    previous_vote_type = existing_vote.vote_type if existing_vote else None
     if existing_vote:
         # Update existing vote
         if existing_vote.vote_type == vote_type:
             # Remove vote (toggle off)
-            if vote_type == "upvote":
-                post.upvotes = max(0, post.upvotes - 1)
-            else:
-                post.downvotes = max(0, post.downvotes - 1)
             db.delete(existing_vote)
         else:
             # Change vote type
-            if existing_vote.vote_type == "upvote":
-                post.upvotes = max(0, post.upvotes - 1)
-                post.downvotes += 1
-            else:
-                post.downvotes = max(0, post.downvotes - 1)
-                post.upvotes += 1
             existing_vote.vote_type = vote_type
     else:
         # Create new vote
@@ -503,19 +501,19 @@ async def vote_post(
             vote_type=vote_type,
         )
         db.add(vote)
-        
-        if vote_type == "upvote":
-            post.upvotes += 1
-        else:
-            post.downvotes += 1
     
+    # Apply the counter changes as one atomic UPDATE (no read-modify-write race)
+    db.query(ForumPost).filter(ForumPost.id == post_id).update(
+        vote_counter_updates(ForumPost, previous_vote_type, vote_type),
+        synchronize_session=False,
+    )
     db.commit()
     
     return {"message": f"Vote {vote_type} recorded", "upvotes": post.upvotes, "downvotes": post.downvotes}
 
 
 @router.post("/replies/{reply_id}/vote", status_code=status.HTTP_200_OK)
-async def vote_reply(
+def vote_reply(
     reply_id: int,
     vote_type: str = Query(..., description="Vote type: upvote or downvote"),
     current_user: User = Depends(get_current_user),
@@ -545,23 +543,14 @@ async def vote_reply(
         ForumVote.reply_id == reply_id
     ).first()
     
+    previous_vote_type = existing_vote.vote_type if existing_vote else None
     if existing_vote:
         # Update existing vote
         if existing_vote.vote_type == vote_type:
             # Remove vote (toggle off)
-            if vote_type == "upvote":
-                reply.upvotes = max(0, reply.upvotes - 1)
-            else:
-                reply.downvotes = max(0, reply.downvotes - 1)
             db.delete(existing_vote)
         else:
             # Change vote type
-            if existing_vote.vote_type == "upvote":
-                reply.upvotes = max(0, reply.upvotes - 1)
-                reply.downvotes += 1
-            else:
-                reply.downvotes = max(0, reply.downvotes - 1)
-                reply.upvotes += 1
             existing_vote.vote_type = vote_type
     else:
         # Create new vote
@@ -572,19 +561,19 @@ async def vote_reply(
             vote_type=vote_type,
         )
         db.add(vote)
-        
-        if vote_type == "upvote":
-            reply.upvotes += 1
-        else:
-            reply.downvotes += 1
     
+    # Apply the counter changes as one atomic UPDATE (no read-modify-write race)
+    db.query(ForumReply).filter(ForumReply.id == reply_id).update(
+        vote_counter_updates(ForumReply, previous_vote_type, vote_type),
+        synchronize_session=False,
+    )
     db.commit()
     
     return {"message": f"Vote {vote_type} recorded", "upvotes": reply.upvotes, "downvotes": reply.downvotes}
 
 
 @router.put("/replies/{reply_id}", response_model=ForumReplyResponse)
-async def update_reply(
+def update_reply(
     reply_id: int,
     reply_update: ForumReplyCreate,
     current_user: User = Depends(get_current_user),
@@ -623,17 +612,12 @@ async def update_reply(
     db.commit()
     db.refresh(reply)
     
-    author_username = None
-    if not reply.is_anonymous and reply.author_id:
-        author = db.query(User).filter(User.id == reply.author_id).first()
-        author_username = author.username if author else None
-    
     return ForumReplyResponse(
         id=reply.id,
         post_id=reply.post_id,
         content=reply.content,
         author_id=reply.author_id,
-        author_username=author_username,
+        author_username=reply.author_username,
         is_anonymous=reply.is_anonymous,
         upvotes=reply.upvotes,
         downvotes=reply.downvotes,
@@ -643,7 +627,7 @@ async def update_reply(
 
 
 @router.delete("/replies/{reply_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_reply(
+def delete_reply(
     reply_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -673,6 +657,8 @@ async def delete_reply(
     if post:
         post.reply_count = max(0, post.reply_count - 1)
     
+    # Votes have no cascade; remove them first (foreign keys are enforced)
+    db.execute(delete(ForumVote).where(ForumVote.reply_id == reply.id))
     db.delete(reply)
     db.commit()
     
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/messages", tags=["messages"])
 
 
 @router.post("", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-async def send_message(
+def send_message(
     message_data: MessageCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -54,6 +54,8 @@ async def send_message(
     message = Message(
         sender_id=current_user.id,
         recipient_id=message_data.recipient_id,
+        sender_username=current_user.username,
+        recipient_username=recipient.username,
         subject=message_data.subject,
         content=message_data.content,
         is_read=False,
@@ -78,7 +80,7 @@ async def send_message(
 
 
 @router.get("", response_model=MessageListResponse)
-async def get_messages(
+def get_messages(
     folder: str = Query("inbox", description="Folder: inbox, sent, all"),
     is_read: bool = Query(None, description="Filter by read status"),
     page: int = Query(1, ge=1),
@@ -91,14 +93,8 @@ async def get_messages(
     
     Requires authentication.
     """
-    # Eager load users to avoid N+1 queries
-    from sqlalchemy.orm import joinedload
-    
-    # Build base query with eager loading
-    base_query = db.query(Message).options(
-        joinedload(Message.sender),
-        joinedload(Message.recipient)
-    )
+    # Usernames are stored on each message, so no user join is needed
+    base_query = db.query(Message)
     
     # Apply folder filter
     if folder == "inbox":
@@ -128,7 +124,7 @@ async def get_messages(
     
     # Apply pagination
     offset = (page - 1) * page_size
-    messages = query.order_by(Message.created_at.desc()).offset(offset).limit(page_size).all()
+    messages = query.order_by(Message.created_at.desc(), Message.id.desc()).offset(offset).limit(page_size).all()
     
     # Calculate total pages
     total_pages = (total + page_size - 1) // page_size if total > 0 else 0
@@ -139,9 +135,9 @@ async def get_messages(
         message_responses.append(MessageResponse(
             id=message.id,
             sender_id=message.sender_id,
-            sender_username=message.sender.username if message.sender else "",
+            sender_username=message.sender_username or "",
             recipient_id=message.recipient_id,
-            recipient_username=message.recipient.username if message.recipient else "",
+            recipient_username=message.recipient_username or "",
             subject=message.subject,
             content=message.content,
             is_read=message.is_read,
@@ -160,7 +156,7 @@ async def get_messages(
 
 
 @router.get("/conversations", response_model=list[ConversationResponse])
-async def get_conversations(
+def get_conversations(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -180,23 +176,18 @@ async def get_conversations(
     for row in received_from:
         user_ids.add(row[0])
     
-    # Eager load all users at once to avoid N+1 queries
-    from sqlalchemy.orm import joinedload
     user_ids_list = list(user_ids)
     
     # Get all users in one query
     users_dict = {u.id: u for u in db.query(User).filter(User.id.in_(user_ids_list)).all()}
     
-    # Get all last messages with eager loading
-    last_messages = db.query(Message).options(
-        joinedload(Message.sender),
-        joinedload(Message.recipient)
-    ).filter(
+    # Get all last messages (usernames are stored on each message)
+    last_messages = db.query(Message).filter(
         or_(
             and_(Message.sender_id == current_user.id, Message.recipient_id.in_(user_ids_list)),
             and_(Message.sender_id.in_(user_ids_list), Message.recipient_id == current_user.id)
         )
-    ).order_by(Message.created_at.desc()).all()
+    ).order_by(Message.created_at.desc(), Message.id.desc()).all()
     
     # Group by user_id and get the most recent message per user
     last_message_by_user = {}
@@ -230,9 +221,9 @@ async def get_conversations(
                 last_message=MessageResponse(
                     id=last_message.id,
                     sender_id=last_message.sender_id,
-                    sender_username=last_message.sender.username if last_message.sender else "",
+                    sender_username=last_message.sender_username or "",
                     recipient_id=last_message.recipient_id,
-                    recipient_username=last_message.recipient.username if last_message.recipient else "",
+                    recipient_username=last_message.recipient_username or "",
                     subject=last_message.subject,
                     content=last_message.content,
                     is_read=last_message.is_read,
@@ -250,7 +241,7 @@ async def get_conversations(
 
 
 @router.get("/conversations/{user_id}", response_model=list[MessageResponse])
-async def get_conversation(
+def get_conversation(
     user_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
@@ -274,7 +265,7 @@ async def get_conversation(
             and_(Message.sender_id == current_user.id, Message.recipient_id == user_id),
             and_(Message.sender_id == user_id, Message.recipient_id == current_user.id)
         )
-    ).order_by(Message.created_at.asc()).offset((page - 1) * page_size).limit(page_size).all()
+    ).order_by(Message.created_at.asc(), Message.id.asc()).offset((page - 1) * page_size).limit(page_size).all()
     
     # Mark messages as read if current user is recipient
     for message in messages:
@@ -286,15 +277,12 @@ async def get_conversation(
     
     message_responses = []
     for message in messages:
-        sender = db.query(User).filter(User.id == message.sender_id).first()
-        recipient = db.query(User).filter(User.id == message.recipient_id).first()
-        
         message_responses.append(MessageResponse(
             id=message.id,
             sender_id=message.sender_id,
-            sender_username=sender.username if sender else "",
+            sender_username=message.sender_username or "",
             recipient_id=message.recipient_id,
-            recipient_username=recipient.username if recipient else "",
+            recipient_username=message.recipient_username or "",
             subject=message.subject,
             content=message.content,
             is_read=message.is_read,
@@ -306,7 +294,7 @@ async def get_conversation(
 
 
 @router.get("/{message_id}", response_model=MessageResponse)
-async def get_message(
+def get_message(
     message_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -338,15 +326,12 @@ async def get_message(
         db.commit()
         db.refresh(message)
     
-    sender = db.query(User).filter(User.id == message.sender_id).first()
-    recipient = db.query(User).filter(User.id == message.recipient_id).first()
-    
     return MessageResponse(
         id=message.id,
         sender_id=message.sender_id,
-        sender_username=sender.username if sender else "",
+        sender_username=message.sender_username or "",
         recipient_id=message.recipient_id,
-        recipient_username=recipient.username if recipient else "",
+        recipient_username=message.recipient_username or "",
         subject=message.subject,
         content=message.content,
         is_read=message.is_read,
@@ -356,7 +341,7 @@ async def get_message(
 
 
 @router.put("/{message_id}/read", response_model=MessageResponse)
-async def mark_as_read(
+def mark_as_read(
     message_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -385,15 +370,12 @@ async def mark_as_read(
     db.commit()
     db.refresh(message)
     
-    sender = db.query(User).filter(User.id == message.sender_id).first()
-    recipient = db.query(User).filter(User.id == message.recipient_id).first()
-    
     return MessageResponse(
         id=message.id,
         sender_id=message.sender_id,
-        sender_username=sender.username if sender else "",
+        sender_username=message.sender_username or "",
         recipient_id=message.recipient_id,
-        recipient_username=recipient.username if recipient else "",
+        recipient_username=message.recipient_username or "",
         subject=message.subject,
         content=message.content,
         is_read=message.is_read,
@@ -403,7 +385,7 @@ async def mark_as_read(
 
 
 @router.put("/read-all", status_code=status.HTTP_200_OK)
-async def mark_all_as_read(
+def mark_all_as_read(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -425,7 +407,7 @@ async def mark_all_as_read(
 
 
 @router.delete("/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_message(
+def delete_message(
     message_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -456,7 +438,7 @@ async def delete_message(
 
 
 @router.get("/unread/count", status_code=status.HTTP_200_OK)
-async def get_unread_count(
+def get_unread_count(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -4,6 +4,7 @@ Payment and point purchase routes.
 import uuid
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
@@ -32,7 +33,7 @@ POINT_PRICING = {
 
 
 @router.post("/purchase-points", response_model=PointPurchaseResponse, status_code=status.HTTP_201_CREATED)
-async def purchase_points(
+def purchase_points(
     purchase_data: PointPurchaseCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -90,7 +91,13 @@ async def purchase_points(
     payment_transaction.completed_at = datetime.utcnow()
     
     # Add points to user account
-    current_user.points_balance += purchase_data.points_amount
+    # Atomic increment: the new balance is computed by the database, never from a loaded value
+    db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(points_balance=User.points_balance + purchase_data.points_amount)
+        .execution_options(synchronize_session=False)
+    )
     
     # Create point transaction record
     point_transaction = PointTransaction(
@@ -118,7 +125,7 @@ async def purchase_points(
 
 
 @router.get("/transactions", response_model=list[PointPurchaseResponse])
-async def get_payment_transactions(
+def get_payment_transactions(
     status_filter: str = Query(None, description="Filter by payment status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -147,7 +154,7 @@ async def get_payment_transactions(
             )
     
     offset = (page - 1) * page_size
-    transactions = query.order_by(PaymentTransaction.created_at.desc()).offset(offset).limit(page_size).all()
+    transactions = query.order_by(PaymentTransaction.created_at.desc(), PaymentTransaction.id.desc()).offset(offset).limit(page_size).all()
     
     return [
         PointPurchaseResponse(
@@ -166,7 +173,7 @@ async def get_payment_transactions(
 
 
 @router.get("/transactions/{transaction_id}", response_model=PointPurchaseResponse)
-async def get_transaction(
+def get_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -206,7 +213,7 @@ async def get_transaction(
 
 
 @router.post("/webhook", status_code=status.HTTP_200_OK)
-async def payment_webhook(
+def payment_webhook(
     webhook_data: PaymentWebhook,
     db: Session = Depends(get_db)
 ):
@@ -235,18 +242,22 @@ async def payment_webhook(
     if webhook_data.status == PaymentStatus.COMPLETED and old_status != PaymentStatus.COMPLETED:
         transaction.completed_at = datetime.utcnow()
         
-        user = db.query(User).filter(User.id == transaction.user_id).first()
-        if user:
-            user.points_balance += transaction.points_amount
-            
-            # Create point transaction
-            point_transaction = PointTransaction(
-                user_id=user.id,
-                amount=transaction.points_amount,
-                transaction_type=PointTransactionType.PURCHASED,
-                description=f"Purchased {transaction.points_amount} points via payment gateway",
-            )
-            db.add(point_transaction)
+        # Atomic increment: the new balance is computed by the database, never from a loaded value
+        db.execute(
+            update(User)
+            .where(User.id == transaction.user_id)
+            .values(points_balance=User.points_balance + transaction.points_amount)
+            .execution_options(synchronize_session=False)
+        )
+        
+        # Create point transaction
+        point_transaction = PointTransaction(
+            user_id=transaction.user_id,
+            amount=transaction.points_amount,
+            transaction_type=PointTransactionType.PURCHASED,
+            description=f"Purchased {transaction.points_amount} points via payment gateway",
+        )
+        db.add(point_transaction)
     
     db.commit()
     
@@ -254,7 +265,7 @@ async def payment_webhook(
 
 
 @router.get("/pricing", status_code=status.HTTP_200_OK)
-async def get_point_pricing():
+def get_point_pricing():
     """
     Get point pricing information.
     
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/points", tags=["points"])
 
 
 @router.get("/balance", response_model=PointsBalanceResponse)
-async def get_points_balance(
+def get_points_balance(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -67,7 +67,7 @@ async def get_points_balance(
 
 
 @router.get("/transactions", response_model=PointTransactionListResponse)
-async def get_point_transactions(
+def get_point_transactions(
     transaction_type: str = Query(None, description="Filter by transaction type"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -100,7 +100,7 @@ async def get_point_transactions(
     
     # Apply pagination
     offset = (page - 1) * page_size
-    transactions = query.order_by(PointTransaction.created_at.desc()).offset(offset).limit(page_size).all()
+    transactions = query.order_by(PointTransaction.created_at.desc(), PointTransaction.id.desc()).offset(offset).limit(page_size).all()
     
     # Calculate total pages
     total_pages = (total + page_size - 1) // page_size if total > 0 else 0
@@ -129,7 +129,7 @@ async def get_point_transactions(
 
 
 @router.get("/transactions/{transaction_id}", response_model=PointTransactionResponse)
-async def get_transaction(
+def get_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -3,15 +3,16 @@ QR code routes for book scanning and history management.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
-from datetime import datetime, date
+from sqlalchemy.orm import joinedload, raiseload
+from datetime import datetime, date, timedelta
 
 from app.core.database import get_db
+from app.core.book_cache import get_cached_response, cache_response
 from app.routes.auth import get_current_user
+from app.routes.books import book_to_response
 from app.models.book import Book, BookHistory
 from app.models.user import User
 from app.schemas.books import (
-    BookResponse,
     QRCodeScanResponse,
     BookHistoryEntry,
     BookHistoryCreate,
@@ -21,7 +22,7 @@ router = APIRouter(prefix="/qr", tags=["qr"])
 
 
 @router.get("/{qr_code_id}", response_model=QRCodeScanResponse)
-async def scan_qr_code(
+def scan_qr_code(
     qr_code_id: str,
     db: Session = Depends(get_db)
 ):
@@ -33,8 +34,13 @@ async def scan_qr_code(
     Returns book information and complete reading history timeline.
     For now, includes mock history data if no real history exists.
     """
+    cache_key = f"qr:{qr_code_id}"
+    cached = get_cached_response(cache_key)
+    if cached is not None:
+        return cached
+    
     # Find book by qr_code_id
-    book = db.query(Book).options(joinedload(Book.owner)).filter(
+    book = db.query(Book).options(joinedload(Book.owner).raiseload("*")).filter(
         Book.qr_code_id == qr_code_id
     ).first()
     
@@ -46,25 +52,28 @@ async def scan_qr_code(
     
     # Get book history with eager loading to avoid N+1 queries
     try:
-        history_entries = db.query(BookHistory).options(
-            joinedload(BookHistory.user)
+        # Only the reader's username is needed: outer join it in as a column (NULL if the user was deleted)
+        history_entries = db.query(BookHistory, User.username).outerjoin(
+            User, User.id == BookHistory.user_id
+        ).options(
+            raiseload("*"),
         ).filter(
             BookHistory.book_id == book.id
-        ).order_by(BookHistory.created_at.asc()).all()
+        ).order_by(BookHistory.created_at.asc(), BookHistory.id.asc()).all()
     except Exception:
         history_entries = []
     
     # Format history entries
     history = []
-    for entry in history_entries:
+    for entry, user_username in history_entries:
         username = None
         reader_name = entry.reader_name
         
         if entry.user_id:
-            if entry.user:
-                username = entry.user.username
+            if user_username is not None:
+                username = user_username
                 if not reader_name:
-                    reader_name = entry.user.username
+                    reader_name = user_username
             else:
                 username = "Anonymous"
                 if not reader_name:
@@ -91,7 +100,6 @@ async def scan_qr_code(
     
     # If no history exists, add mock history data for demonstration
     if len(history) == 0:
-        from datetime import timedelta
         mock_history = [
             BookHistoryEntry(
                 id=0,
@@ -134,42 +142,25 @@ async def scan_qr_code(
         current_holder = {
             "id": book.owner.id,
             "username": book.owner.username,
-            "email": book.owner.email if hasattr(book.owner, 'email') else None,
+            "email": book.owner.email,
         }
     
     # Convert book to response format
-    from app.schemas.books import BookCondition
-    condition_enum = BookCondition(book.condition)
     owner_username = book.owner.username if book.owner else "Unknown"
     
-    book_response = BookResponse(
-        id=book.id,
-        permanent_id=getattr(book, 'permanent_id', None),
-        qr_code_id=getattr(book, 'qr_code_id', None),
-        title=book.title,
-        author=book.author,
-        condition=condition_enum,
-        description=book.description,
-        image_urls=book.image_urls if isinstance(book.image_urls, list) else [],
-        location=book.location,
-        point_value=book.point_value,
-        is_available=book.is_available,
-        qr_code=book.qr_code,
-        owner_id=book.owner_id,
-        owner_username=owner_username,
-        created_at=book.created_at,
-        updated_at=book.updated_at,
-    )
+    book_response = book_to_response(book, owner_username)
     
-    return QRCodeScanResponse(
+    scan_response = QRCodeScanResponse(
         book=book_response,
         history=history,
         current_holder=current_holder,
     )
+    cache_response(cache_key, book.id, scan_response)
+    return scan_response
 
 
 @router.post("/{qr_code_id}/add-history", response_model=BookHistoryEntry, status_code=status.HTTP_201_CREATED)
-async def add_qr_history(
+def add_qr_history(
     qr_code_id: str,
     history_data: BookHistoryCreate,
     current_user: User = Depends(get_current_user),
@@ -63,10 +63,11 @@ class BookResponse(BaseModel):
 class BookListResponse(BaseModel):
     """Paginated book list response."""
     books: List[BookResponse]
-    total: int
+    total: Optional[int] = None  # None for cursor-based requests
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None  # None for cursor-based requests
+    next_cursor: Optional[str] = None  # Pass as cursor to fetch the next page
 
 
 class BookSearchFilters(BaseModel):
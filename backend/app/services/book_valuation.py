@@ -4,13 +4,21 @@ Calculates book value based on condition, demand, and rarity.
 Includes OpenAI integration for intelligent pricing.
 """
 import os
+import hashlib
 import logging
+import threading
+import time
+from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.ai_price import AIPrice
 from app.models.book import Book, Wishlist
 from app.models.exchange import ExchangeRequest, ExchangeStatus
 from app.core.config import settings
+from app.core.database import is_sqlite
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +30,16 @@ except ImportError:
     OPENAI_AVAILABLE = False
     logger.warning("OpenAI package not installed. AI pricing will use fallback method.")
 
+# AI prices by normalized (title, author, condition) -> (expires_at, points)
+# Only successful answers are cached, so a failed call is retried next time
+# The AI base price depends only on the key (demand/rarity are computed live), so it can be kept long
+# This dict is a per-process front for the ai_prices table, which survives restarts
+# and is shared by all workers
+AI_PRICING_CACHE_SECONDS = 30 * 24 * 60 * 60
+_AI_PRICING_CACHE_MAXSIZE = 4096
+_ai_pricing_cache: dict = {}
+_ai_pricing_cache_lock = threading.Lock()
+
 
 def calculate_demand_score(book_id: int, db: Session) -> float:
     """
@@ -97,7 +115,63 @@ def calculate_condition_multiplier(condition: str) -> float:
     return condition_multipliers.get(condition.lower(), 0.6)
 
 
-def get_openai_pricing(title: str, author: str, condition: str) -> Optional[int]:
+def _remember_ai_price(cache_key: tuple, points: int, expires_at: float):
+    """Store an AI price in the in-process cache."""
+    with _ai_pricing_cache_lock:
+        if len(_ai_pricing_cache) >= _AI_PRICING_CACHE_MAXSIZE and cache_key not in _ai_pricing_cache:
+            # Evict the oldest entry (dicts keep insertion order)
+            _ai_pricing_cache.pop(next(iter(_ai_pricing_cache)))
+        _ai_pricing_cache[cache_key] = (expires_at, points)
+
+
+def _ai_pricing_enabled() -> bool:
+    """True if OpenAI pricing is switched on and usable."""
+    if not settings.ENABLE_AI_PRICING or not OPENAI_AVAILABLE:
+        return False
+    
+    if not settings.OPENAI_API_KEY:
+        logger.debug("OpenAI API key not set. Using fallback pricing.")
+        return False
+    return True
+
+
+def _ai_price_keys(title: str, author: str, condition: str) -> tuple:
+    """(in-process key, ai_prices key) for a case-insensitive (title, author, condition)."""
+    cache_key = (title.strip().lower(), author.strip().lower(), condition.lower())
+    return cache_key, hashlib.sha256("|".join(cache_key).encode("utf-8")).hexdigest()
+
+
+def get_cached_ai_price(title: str, author: str, condition: str, db: Optional[Session] = None) -> Optional[int]:
+    """
+    Return a cached AI base price without calling OpenAI, or None on a miss.
+    Checks the in-process cache, then the ai_prices table when db is given.
+    """
+    if not _ai_pricing_enabled():
+        return None
+    
+    cache_key, db_key = _ai_price_keys(title, author, condition)
+    now = time.monotonic()
+    with _ai_pricing_cache_lock:
+        entry = _ai_pricing_cache.get(cache_key)
+        if entry is not None:
+            expires_at, cached_points = entry
+            if expires_at > now:
+                return cached_points
+            del _ai_pricing_cache[cache_key]
+    
+    if db is not None:
+        stored = db.execute(
+            select(AIPrice.points, AIPrice.created_at).where(AIPrice.cache_key == db_key)
+        ).first()
+        if stored is not None:
+            age = (datetime.utcnow() - stored.created_at).total_seconds()
+            if age < AI_PRICING_CACHE_SECONDS:
+                _remember_ai_price(cache_key, stored.points, now + AI_PRICING_CACHE_SECONDS - age)
+                return stored.points
+    return None
+
+
+def get_openai_pricing(title: str, author: str, condition: str, db: Optional[Session] = None) -> Optional[int]:
     """
     Use OpenAI to get intelligent book pricing based on title, author, and condition.
     
@@ -105,17 +179,20 @@ def get_openai_pricing(title: str, author: str, condition: str) -> Optional[int]
         title: Book title
         author: Book author
         condition: Book condition (excellent, good, fair, poor)
+        db: Optional database session for the persistent ai_prices cache
     
     Returns:
         Suggested point value (5-50 range) or None if AI fails
+    
+    Answers are cached for AI_PRICING_CACHE_SECONDS per (title, author, condition),
+    compared case-insensitively: in-process first, then in the ai_prices table
+    when db is given. New answers are written in the caller's transaction.
     """
-    # Check if OpenAI is enabled and available
-    if not settings.ENABLE_AI_PRICING or not OPENAI_AVAILABLE:
-        return None
+    cached_points = get_cached_ai_price(title, author, condition, db)
+    if cached_points is not None or not _ai_pricing_enabled():
+        return cached_points
     
-    if not settings.OPENAI_API_KEY:
-        logger.debug("OpenAI API key not set. Using fallback pricing.")
-        return None
+    cache_key, db_key = _ai_price_keys(title, author, condition)
     
     try:
         client = OpenAI(api_key=settings.OPENAI_API_KEY)
@@ -159,7 +236,6 @@ Do not include any explanation, just the number."""
             # Clamp to valid range
             point_value = max(5, min(50, point_value))
             logger.info(f"OpenAI pricing for '{title}' by {author}: {point_value} points")
-            return point_value
         else:
             logger.warning(f"OpenAI returned non-numeric response: {result_text}")
             return None
@@ -167,6 +243,20 @@ Do not include any explanation, just the number."""
     except Exception as e:
         logger.error(f"OpenAI pricing failed: {str(e)}")
         return None
+    
+    # Cache outside the try: a database error must not be reported as an AI failure
+    _remember_ai_price(cache_key, point_value, time.monotonic() + AI_PRICING_CACHE_SECONDS)
+    if db is not None:
+        # Upsert: another worker may have priced the same book meanwhile
+        insert_price = sqlite_insert if is_sqlite else postgresql_insert
+        statement = insert_price(AIPrice).values(
+            cache_key=db_key, points=point_value, created_at=datetime.utcnow()
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={"points": statement.excluded.points, "created_at": statement.excluded.created_at},
+        ))
+    return point_value
 
 
 def calculate_book_value(book_id: int, db: Session, base_points: int = None, use_ai: bool = True) -> int:
@@ -196,7 +286,7 @@ def calculate_book_value(book_id: int, db: Session, base_points: int = None, use
     # Try OpenAI pricing first if enabled
     ai_base_points = None
     if use_ai:
-        ai_base_points = get_openai_pricing(book.title, book.author, book.condition)
+        ai_base_points = get_openai_pricing(book.title, book.author, book.condition, db)
     
     # Get base points if not provided
     if base_points is None:
@@ -2,6 +2,7 @@
 Circular exchange prevention using graph theory.
 Detects cycles in exchange graph to prevent point farming.
 """
+from collections import deque
 from typing import Dict, List, Set
 from sqlalchemy.orm import Session
 from app.models.exchange import ExchangeRequest, ExchangeStatus
@@ -59,25 +60,30 @@ class ExchangeGraph:
         
         return False
     
+    def has_path(self, from_user: int, to_user: int) -> bool:
+        """
+        Check if to_user is reachable from from_user.
+        Iterative BFS: stops at the first hit and only visits nodes reachable
+        from from_user (no recursion limit on long exchange chains).
+        """
+        visited: Set[int] = {from_user}
+        queue = deque([from_user])
+        while queue:
+            for neighbor in self.graph.get(queue.popleft(), []):
+                if neighbor == to_user:
+                    return True
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        return False
+    
     def would_create_cycle(self, from_user: int, to_user: int) -> bool:
         """
         Check if adding an edge from from_user to to_user would create a cycle.
-        Temporarily adds the edge and checks for cycles.
+        The graph is kept acyclic (every edge passes this check), so a cycle
+        through the new edge exists exactly when from_user is reachable from to_user.
         """
-        # Add temporary edge
-        if from_user not in self.graph:
-            self.graph[from_user] = []
-        self.graph[from_user].append(to_user)
-        
-        # Check for cycle
-        has_cycle = self.has_cycle(from_user)
-        
-        # Remove temporary edge
-        self.graph[from_user].remove(to_user)
-        if not self.graph[from_user]:
-            del self.graph[from_user]
-        
-        return has_cycle
+        return from_user == to_user or self.has_path(to_user, from_user)
 
 
 def build_exchange_graph(db: Session, exclude_exchange_id: int = None) -> ExchangeGraph:
@@ -97,7 +103,8 @@ def build_exchange_graph(db: Session, exclude_exchange_id: int = None) -> Exchan
     
     # Only consider PENDING and APPROVED exchanges for circular detection
     # COMPLETED exchanges have already transferred ownership, so they don't create circular risks
-    query = db.query(ExchangeRequest).filter(
+    # Only the two endpoint columns are read: plain tuples, no ExchangeRequest instances
+    query = db.query(ExchangeRequest.requester_id, ExchangeRequest.owner_id).filter(
         ExchangeRequest.status.in_([
             ExchangeStatus.PENDING,
             ExchangeStatus.APPROVED
@@ -107,13 +114,11 @@ def build_exchange_graph(db: Session, exclude_exchange_id: int = None) -> Exchan
     if exclude_exchange_id:
         query = query.filter(ExchangeRequest.id != exclude_exchange_id)
     
-    exchanges = query.all()
-    
     # Build graph edges
-    for exchange in exchanges:
+    for requester_id, owner_id in query:
         # Edge: requester -> owner (requester wants owner's book)
         # This represents an active "debt" or pending exchange
-        graph.add_edge(exchange.requester_id, exchange.owner_id)
+        graph.add_edge(requester_id, owner_id)
     
     return graph
 
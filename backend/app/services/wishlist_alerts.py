@@ -2,43 +2,65 @@
 Wishlist availability alerts service.
 Notifies users when books in their wishlist become available.
 """
-from sqlalchemy.orm import Session
+from typing import Iterable
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, aliased
 from app.models.book import Book, Wishlist
 from app.models.user import User
 from app.models.message import Message
 
 
-def check_and_send_wishlist_alerts(book_id: int, db: Session):
+def check_and_send_wishlist_alerts(book_ids: Iterable[int], db: Session):
     """
-    Check if book is in any user's wishlist and send alerts.
-    Called when a book becomes available.
-    
+    Check if books are in any user's wishlist and send alerts.
+    Called when books become available.
+
+    All wishlist entries for the given books are read with one query and the
+    alert messages are written with one batched INSERT.
+
     Args:
-        book_id: Book ID that became available
+        book_ids: IDs of books that became available
         db: Database session
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if not book or not book.is_available:
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+
+    # Callers flip is_available on loaded books; make that visible to the query
+    db.flush()
+
+    owner = aliased(User)
+    recipient = aliased(User)
+    rows = db.execute(
+        select(
+            Book.title,
+            Book.author,
+            Book.owner_id,
+            owner.username.label("owner_username"),
+            recipient.id.label("recipient_id"),
+            recipient.username.label("recipient_username"),
+        )
+        .join(Wishlist, Wishlist.book_id == Book.id)
+        .join(recipient, recipient.id == Wishlist.user_id)
+        .join(owner, owner.id == Book.owner_id)
+        .where(Book.id.in_(book_ids), Book.is_available == True)
+    ).all()
+
+    if not rows:
         return
-    
-    # Get all users who have this book in their wishlist
-    wishlist_items = db.query(Wishlist).filter(Wishlist.book_id == book_id).all()
-    
-    for wishlist_item in wishlist_items:
-        user = db.query(User).filter(User.id == wishlist_item.user_id).first()
-        if user:
-            # Create alert message (use book owner as sender for now, or create a system user)
-            # In production, you might want to create a system user account
-            sender_id = book.owner_id if book.owner_id else 1  # Use book owner or default system user
-            
-            alert_message = Message(
-                sender_id=sender_id,
-                recipient_id=user.id,
-                subject=f"Book Available: {book.title}",
-                content=f"The book '{book.title}' by {book.author} that you added to your wishlist is now available!",
-                is_read=False,
-            )
-            db.add(alert_message)
-    
-    if wishlist_items:
-        db.commit()
+
+    # Alerts are sent in the book owner's name
+    db.execute(insert(Message), [
+        {
+            "sender_id": row.owner_id,
+            "sender_username": row.owner_username,
+            "recipient_id": row.recipient_id,
+            "recipient_username": row.recipient_username,
+            "subject": f"Book Available: {row.title}",
+            "content": f"The book '{row.title}' by {row.author} that you added to your wishlist is now available!",
+            "is_read": False,
+        }
+        for row in rows
+    ])
+    db.commit()
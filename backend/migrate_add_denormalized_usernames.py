@@ -0,0 +1,116 @@
+"""
+Migration script to add denormalized username columns and backfill them.
+Run this from the backend directory: python migrate_add_denormalized_usernames.py
+
+Adds:
+- forum_posts.author_username
+- forum_replies.author_username
+- messages.sender_username, messages.recipient_username
+- books.owner_username
+
+Existing rows are backfilled from users.username (anonymous forum rows stay NULL).
+The script is idempotent - re-running it is safe.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.config import settings
+
+# (table, username column, user id column)
+COLUMNS = (
+    ("books", "owner_username", "owner_id"),
+    ("forum_posts", "author_username", "author_id"),
+    ("forum_replies", "author_username", "author_id"),
+    ("messages", "sender_username", "sender_id"),
+    ("messages", "recipient_username", "recipient_id"),
+)
+
+BACKFILL_SQL = (
+    "UPDATE {table} SET {column} = "
+    "(SELECT users.username FROM users WHERE users.id = {table}.{id_column}) "
+    "WHERE {column} IS NULL AND {id_column} IS NOT NULL"
+)
+
+
+def migrate_sqlite():
+    """Add and backfill the username columns on a SQLite database."""
+    db_path = backend_dir / "booksexchange.db"
+
+    if not db_path.exists():
+        print(f"[ERROR] Database file not found: {db_path}")
+        return False
+
+    print(f"Connecting to database: {db_path}")
+
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        for table, column, id_column in COLUMNS:
+            column_exists = cursor.execute(
+                f"SELECT 1 FROM pragma_table_info('{table}') WHERE name = ? LIMIT 1",
+                (column,),
+            ).fetchone() is not None
+
+            if column_exists:
+                print(f"[OK] Column '{table}.{column}' already exists.")
+            else:
+                print(f"Adding '{table}.{column}' column...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} VARCHAR(50)")
+
+            cursor.execute(BACKFILL_SQL.format(table=table, column=column, id_column=id_column))
+            print(f"  Backfilled {cursor.rowcount} row(s)")
+        cursor.execute("COMMIT")
+        return True
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def migrate_postgres():
+    """Add and backfill the username columns on a PostgreSQL database."""
+    from sqlalchemy import text
+    from app.core.database import create_script_engine
+
+    engine = create_script_engine()
+
+    print("Connecting to PostgreSQL database...")
+
+    try:
+        with engine.begin() as conn:
+            for table, column, id_column in COLUMNS:
+                print(f"Adding '{table}.{column}' column (if missing)...")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} VARCHAR(50)"))
+                result = conn.execute(text(BACKFILL_SQL.format(table=table, column=column, id_column=id_column)))
+                print(f"  Backfilled {result.rowcount} row(s)")
+        return True
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        if settings.DATABASE_URL.startswith("sqlite"):
+            success = migrate_sqlite()
+        else:
+            success = migrate_postgres()
+
+        if not success:
+            exit(1)
+
+        print("[OK] Migration completed! Denormalized username columns are populated.")
+        print("You can now restart your backend server.")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
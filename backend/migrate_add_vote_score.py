@@ -0,0 +1,102 @@
+"""
+Migration script to add the maintained vote score column and backfill it.
+Run this from the backend directory: python migrate_add_vote_score.py
+
+Adds forum_posts.score and forum_replies.score (upvotes - downvotes) with an
+index on each, then backfills existing rows.
+The script is idempotent - re-running it is safe.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.config import settings
+
+TABLES = ("forum_posts", "forum_replies")
+
+BACKFILL_SQL = "UPDATE {table} SET score = upvotes - downvotes WHERE score <> upvotes - downvotes"
+INDEX_SQL = "CREATE INDEX IF NOT EXISTS ix_{table}_score ON {table}(score)"
+
+
+def migrate_sqlite():
+    """Add, backfill and index the score columns on a SQLite database."""
+    db_path = backend_dir / "booksexchange.db"
+
+    if not db_path.exists():
+        print(f"[ERROR] Database file not found: {db_path}")
+        return False
+
+    print(f"Connecting to database: {db_path}")
+
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        for table in TABLES:
+            column_exists = cursor.execute(
+                f"SELECT 1 FROM pragma_table_info('{table}') WHERE name = 'score' LIMIT 1"
+            ).fetchone() is not None
+
+            if column_exists:
+                print(f"[OK] Column '{table}.score' already exists.")
+            else:
+                print(f"Adding '{table}.score' column...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN score INTEGER NOT NULL DEFAULT 0")
+
+            cursor.execute(BACKFILL_SQL.format(table=table))
+            print(f"  Backfilled {cursor.rowcount} row(s)")
+            cursor.execute(INDEX_SQL.format(table=table))
+        cursor.execute("COMMIT")
+        return True
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def migrate_postgres():
+    """Add, backfill and index the score columns on a PostgreSQL database."""
+    from sqlalchemy import text
+    from app.core.database import create_script_engine
+
+    engine = create_script_engine()
+
+    print("Connecting to PostgreSQL database...")
+
+    try:
+        with engine.begin() as conn:
+            for table in TABLES:
+                print(f"Adding '{table}.score' column (if missing)...")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS score INTEGER NOT NULL DEFAULT 0"))
+                result = conn.execute(text(BACKFILL_SQL.format(table=table)))
+                print(f"  Backfilled {result.rowcount} row(s)")
+                conn.execute(text(INDEX_SQL.format(table=table)))
+        return True
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        if settings.DATABASE_URL.startswith("sqlite"):
+            success = migrate_sqlite()
+        else:
+            success = migrate_postgres()
+
+        if not success:
+            exit(1)
+
+        print("[OK] Migration completed! Vote score columns are populated.")
+        print("You can now restart your backend server.")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)